@@ -0,0 +1,256 @@
+#!  /usr/bin/env python3
+__author__ = "Bradley Huffaker"
+__email__ = "<bradley@caida.org>"
+# This software is Copyright (C) 2021 The Regents of the University of
+# California. All Rights Reserved. Permission to copy, modify, and
+# distribute this software and its documentation for educational, research
+# and non-profit purposes, without fee, and without a written agreement is
+# hereby granted, provided that the above copyright notice, this paragraph
+# and the following three paragraphs appear in all copies. Permission to
+# make commercial use of this software may be obtained by contacting:
+#
+# Office of Innovation and Commercialization
+#
+# 9500 Gilman Drive, Mail Code 0910
+#
+# University of California
+#
+# La Jolla, CA 92093-0910
+#
+# (858) 534-5815
+#
+# invent@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of
+# the University of California. The software program and documentation are
+# supplied "as is", without any accompanying services from The Regents. The
+# Regents does not warrant that the operation of the program will be
+# uninterrupted or error-free. The end-user understands that the program
+# was developed for research purposes and is advised not to rely
+# exclusively on the program for any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES,
+# INCLUDING LOST PR OFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS
+# DOCUMENTATION, EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY
+# DISCLAIMS ANY WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE
+# SOFTWARE PROVIDED HEREUNDER IS ON AN "AS IS" BASIS, AND THE UNIVERSITY OF
+# CALIFORNIA HAS NO OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
+# ENHANCEMENTS, OR MODIFICATIONS.
+
+################################## Imports #####################################
+
+import argparse
+import datetime
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+
+#################################### Header ####################################
+
+"""
+    Generates a synthetic sources/ tree of a chosen size, runs
+    scripts/data-build.py on it with -p and appends the sizes and the
+    build's profile (per phase wall/cpu time and memory peak, the slowest
+    files and the call counts) as one JSON line to a results file, so runs
+    of different commits can be compared.
+
+        python3 scripts/bench-build.py -P 20000 -a 6 -b bench_build.jsonl
+"""
+
+################################# Main Method ##################################
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-d", dest="datasets", type=int, default=200, help="number of datasets")
+    parser.add_argument("-P", dest="papers", type=int, default=2000, help="number of papers")
+    parser.add_argument("-m", dest="media", type=int, default=300, help="number of media")
+    parser.add_argument("-s", dest="software", type=int, default=100, help="number of software")
+    parser.add_argument("-r", dest="recipes", type=int, default=20, help="number of recipes")
+    parser.add_argument("-n", dest="persons", type=int, default=1000, help="number of persons")
+    parser.add_argument("-t", dest="tags", type=int, default=300, help="number of distinct tags")
+    parser.add_argument("-l", dest="links", type=int, default=3, help="average links per object")
+    parser.add_argument("-a", dest="authors", type=int, default=4, help="average authors per paper")
+    parser.add_argument("-w", dest="words", type=int, default=150, help="average words per description")
+    parser.add_argument("-S", dest="seed", type=int, default=0, help="random seed")
+    parser.add_argument("-j", dest="jobs", type=int, default=None, help="passed to data-build.py -j")
+    parser.add_argument("-x", dest="build_args", type=str, default="", help="other data-build.py arguments, as one string")
+    parser.add_argument("-o", dest="directory", type=str, default=None, help="build in this directory and keep it, default a temporary one")
+    parser.add_argument("-b", dest="results", type=str, default="bench_build.jsonl", help="file the results are appended to")
+    parser.add_argument("-L", dest="label", type=str, default=None, help="label stored with the results")
+    args = parser.parse_args()
+
+    directory = args.directory
+    if directory is None:
+        directory = tempfile.mkdtemp(prefix="bench-build-")
+    try:
+        print ("generating",directory)
+        counts = tree_create(directory, args)
+        result = build_run(directory, args)
+    finally:
+        if args.directory is None:
+            shutil.rmtree(directory)
+
+    result["sizes"] = {
+        "datasets":args.datasets, "papers":args.papers, "media":args.media,
+        "software":args.software, "recipes":args.recipes, "persons":args.persons,
+        "tags":args.tags, "links":args.links, "authors":args.authors, "words":args.words,
+        "seed":args.seed
+    }
+    result["files"] = counts
+    with open(args.results, "a") as f:
+        f.write(json.dumps(result)+"\n")
+
+    report_print(result)
+    print ("appended to",args.results)
+    if result["exit"] != 0:
+        sys.exit(result["exit"])
+
+############################### Helper Methods #################################
+
+def build_run(directory, args):
+    scripts = os.path.dirname(os.path.abspath(__file__))
+    profile_file = os.path.join(directory, "bench_profile.json")
+    command = [sys.executable, os.path.join(scripts, "data-build.py"), "-p", profile_file]
+    if args.jobs is not None:
+        command.extend(["-j", str(args.jobs)])
+    command.extend(args.build_args.split())
+    print (" ".join(command))
+
+    result = {
+        "date":datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit":commit_get(scripts),
+        "label":args.label,
+        "command":command[1:]
+    }
+    with open(os.path.join(directory, "bench_output.txt"), "w") as f:
+        result["exit"] = subprocess.call(command, cwd=directory, stdout=f, stderr=subprocess.STDOUT)
+    if result["exit"] != 0:
+        with open(os.path.join(directory, "bench_output.txt")) as f:
+            print (f.read()[-2000:])
+    if os.path.exists(profile_file):
+        with open(profile_file) as f:
+            result["profile"] = json.load(f)
+    return result
+
+def commit_get(directory):
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=directory, stderr=subprocess.DEVNULL).decode().strip()
+        status = subprocess.check_output(["git", "status", "--porcelain", "--", "."], cwd=directory, stderr=subprocess.DEVNULL).decode()
+        if len(status.strip()) > 0:
+            commit += "+dirty"
+        return commit
+    except (subprocess.CalledProcessError, OSError):
+        return None
+
+def report_print(result):
+    if "profile" not in result:
+        print ("no profile, data-build.py exited with",result["exit"])
+        return
+    profile = result["profile"]
+    print ("%-16s %9s %9s %10s" % ("phase", "wall s", "cpu s", "peak MB"))
+    for phase in profile["phases"]:
+        print ("%-16s %9.3f %9.3f %10.1f" % (phase["name"], phase["wall"], phase["cpu"], phase["memory_peak"]/1e6))
+    print ("%-16s %9.3f %9.3f %10.1f" % ("total", profile["wall"], profile["cpu"], profile["memory_peak"]/1e6))
+    for name, count in sorted(profile["counts"].items()):
+        print ("    %-14s %d" % (name, count))
+
+###########################
+# synthetic tree
+#   Word frequencies roughly follow Zipf's law, ids and names are built
+#   from the words, and every reference points at an object that exists
+#   (persons and tags are also created on first use, like the real tree).
+###########################
+words_base = ["internet","topology","routing","bgp","dns","measurement","traffic","ipv4","ipv6",
+    "telescope","security","latency","outage","peering","prefix","traceroute","geolocation",
+    "censorship","spoofing","anycast","ixp","as","relationship","congestion","scanning","darknet",
+    "policy","economics","mapping","inference","packet","router","alias","resolution","data"]
+
+def tree_create(directory, args):
+    rand = random.Random(args.seed)
+    words = words_base + ["w%d" % (i) for i in range(5000)]
+    weights = [1/(i+1) for i in range(len(words))]
+    tags = [" ".join(rand.choices(words[:200], k=rand.randint(1, 2))) for i in range(args.tags)]
+
+    def text(n):
+        return " ".join(rand.choices(words, weights, k=max(1, int(rand.expovariate(1/n)))))
+
+    def name():
+        return " ".join(rand.choices(words, weights, k=rand.randint(2, 6))).title()
+
+    sources = os.path.join(directory, "sources")
+    counts = {}
+
+    persons = []
+    for i in range(args.persons):
+        last, first = rand.choice(words).title(), rand.choice(words).title()
+        persons.append("person:%s__%s_%d" % (last.lower(), first.lower(), i))
+        file_write(sources, "person", "%s__%s_%d" % (last.lower(), first.lower(), i), {
+            "id":persons[-1],
+            "nameFirst":"%s %d" % (first, i),
+            "nameLast":last
+        })
+    counts["person"] = args.persons
+
+    ids = []
+    for type_, number in [["dataset", args.datasets], ["software", args.software], ["paper", args.papers], ["media", args.media]]:
+        for i in range(number):
+            short = "%s_%d" % ("_".join(rand.choices(words[:200], k=2)), i)
+            if type_ == "paper" or type_ == "media":
+                short = "%d_%s" % (rand.randint(1995, 2021), short)
+            obj = {
+                "id":short,
+                "name":name(),
+                "description":text(args.words),
+                "tags":rand.sample(tags, min(len(tags), rand.randint(1, 6)))
+            }
+            if type_ == "paper":
+                obj["datePublished"] = "%d.%02d" % (rand.randint(1995, 2021), rand.randint(1, 12))
+                obj["publisher"] = rand.choice(["IMC","SIGCOMM","PAM","TMA","CCR"])
+                obj["authors"] = [{"person":rand.choice(persons), "organizations":[rand.choice(["CAIDA","UCSD","MIT","ISI"])]}
+                    for j in range(max(1, int(rand.expovariate(1/args.authors))))]
+            elif type_ == "media":
+                obj["date"] = "%d.%02d" % (rand.randint(1995, 2021), rand.randint(1, 12))
+                obj["presenters"] = [{"person":rand.choice(persons), "date":obj["date"]}]
+            elif type_ == "dataset":
+                obj["dateStart"] = "%d.%02d" % (rand.randint(1995, 2021), rand.randint(1, 12))
+                obj["licenses"] = ["license:"+rand.choice(["caida_aua","cc_by_4_0","bsd_2_clause"])]
+            obj["resources"] = [{"name":"PDF", "url":"https://example.org/"+short+".pdf"}]
+            links = [{"to":rand.choice(ids)} for j in range(int(rand.expovariate(1/args.links)))] if len(ids) > 0 else []
+            if len(links) > 0:
+                obj["links"] = links
+            file_write(sources, type_, short, obj)
+            ids.append(type_+":"+short)
+        counts[type_] = number
+
+    for i in range(args.recipes):
+        short = "how_to_%s_%d" % ("_".join(rand.choices(words[:200], k=3)), i)
+        path = os.path.join(sources, "recipe", short)
+        os.makedirs(path, exist_ok=True)
+        header = {
+            "id":short,
+            "name":name(),
+            "description":text(20),
+            "tags":rand.sample(tags, min(len(tags), 3)),
+            "links":rand.sample(ids, min(len(ids), 2)),
+            "authors":[{"person":rand.choice(persons), "organizations":["CAIDA"]}]
+        }
+        with open(os.path.join(path, "README.md"), "w") as f:
+            f.write("~~~json\n"+json.dumps(header, indent=4)+"\n~~~\n\n## Solution\n\n"+text(args.words*3)+"\n")
+    counts["recipe"] = args.recipes
+    return counts
+
+def file_write(sources, type_, short, obj):
+    path = os.path.join(sources, type_)
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, short+".json"), "w") as f:
+        json.dump(obj, f, indent=4)
+
+# Run the script given the inputs from the terminal.
+main()
@@ -0,0 +1,217 @@
+#!  /usr/bin/env python3
+__author__ = "Bradley Huffaker"
+__email__ = "<bradley@caida.org>"
+# This software is Copyright (C) 2021 The Regents of the University of
+# California. All Rights Reserved. Permission to copy, modify, and
+# distribute this software and its documentation for educational, research
+# and non-profit purposes, without fee, and without a written agreement is
+# hereby granted, provided that the above copyright notice, this paragraph
+# and the following three paragraphs appear in all copies. Permission to
+# make commercial use of this software may be obtained by contacting:
+#
+# Office of Innovation and Commercialization
+#
+# 9500 Gilman Drive, Mail Code 0910
+#
+# University of California
+#
+# La Jolla, CA 92093-0910
+#
+# (858) 534-5815
+#
+# invent@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of
+# the University of California. The software program and documentation are
+# supplied "as is", without any accompanying services from The Regents. The
+# Regents does not warrant that the operation of the program will be
+# uninterrupted or error-free. The end-user understands that the program
+# was developed for research purposes and is advised not to rely
+# exclusively on the program for any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES,
+# INCLUDING LOST PR OFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS
+# DOCUMENTATION, EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY
+# DISCLAIMS ANY WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE
+# SOFTWARE PROVIDED HEREUNDER IS ON AN "AS IS" BASIS, AND THE UNIVERSITY OF
+# CALIFORNIA HAS NO OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
+# ENHANCEMENTS, OR MODIFICATIONS.
+
+################################## Imports #####################################
+
+import argparse
+import difflib
+import os
+import sys
+import tempfile
+import time
+
+import externallinks_placeholder as externallinks
+
+#################################### Header ####################################
+
+"""
+    Times externallinks_placeholder.py's data-papers.yaml tokenizer against
+    the line by line parser it replaced, kept below as records_reference,
+    on a copy of the file replicated -n times.  Both have to give the same
+    [field, value] pairs for every paper.
+
+    Then times topkey_close_match against difflib.get_close_matches over
+    the file's distinct TOPKEYs, both have to pick the same keys.
+"""
+
+################################# Main Method ##################################
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-d", dest="data_papers", type=str, default="data/data-papers.yaml", help="Path to data-papers.yaml")
+    parser.add_argument("-n", dest="copies", type=int, default=10, help="number of copies of the file parsed")
+    parser.add_argument("-r", dest="repeat", type=int, default=5, help="number of timed runs")
+    args = parser.parse_args()
+
+    with open(args.data_papers) as f:
+        data = f.read()
+    # the copies have to be separated by a "---" line
+    if not data.endswith("\n"):
+        data += "\n"
+    data = (data + "---\n")*args.copies
+
+    f, filename = tempfile.mkstemp(suffix=".yaml")
+    try:
+        with os.fdopen(f, "w") as f:
+            f.write(data)
+        print ("%s x %d  %.1f MB" % (args.data_papers, args.copies, len(data)/1e6))
+
+        reference = records_reference(filename)
+        records = list(externallinks.data_papers_records(filename))
+        if records != reference:
+            for i, (a, b) in enumerate(zip(reference, records)):
+                if a != b:
+                    print ("paper",i,"differs\n   ",a,"\n   ",b)
+                    break
+            print ("papers", len(reference), len(records))
+            sys.exit(1)
+
+        for name, function in [
+                ["reference", records_reference],
+                ["records", lambda filename: list(externallinks.data_papers_records(filename)) ]]:
+            times = []
+            for i in range(args.repeat):
+                start = time.perf_counter()
+                function(filename)
+                times.append(time.perf_counter() - start)
+            times.sort()
+            print ("%-10s papers %d  min %.3f s  median %.3f s" % (name, len(records), times[0], times[len(times)//2]))
+    finally:
+        os.remove(filename)
+
+    datasets = set()
+    for fields in records:
+        for field, value in fields:
+            if field == "TOPKEY":
+                for dataset in value.split(","):
+                    dataset = dataset.strip().lower()
+                    if len(dataset) > 0 and dataset not in externallinks.topkey_2_dataset:
+                        datasets.add(dataset)
+    datasets = sorted(datasets)
+    keys = externallinks.topkey_2_dataset.keys()
+    matches = [difflib.get_close_matches(dataset, keys, 1) for dataset in datasets]
+    for dataset, match in zip(datasets, matches):
+        close = externallinks.topkey_close_match(dataset)
+        if match != ([close] if close is not None else []):
+            print (dataset,"difflib",match,"topkey_close_match",close)
+            sys.exit(1)
+    print ("distinct TOPKEYs %d, %d have a close match" % (len(datasets), sum(len(match) for match in matches)))
+    for name, function in [
+            ["difflib", lambda dataset: difflib.get_close_matches(dataset, keys, 1)],
+            ["close", externallinks.topkey_close_match]]:
+        times = []
+        for i in range(args.repeat):
+            start = time.perf_counter()
+            for dataset in datasets:
+                function(dataset)
+            times.append(time.perf_counter() - start)
+        times.sort()
+        print ("%-10s min %.4f s  median %.4f s" % (name, times[0], times[len(times)//2]))
+
+############################### Helper Methods #################################
+
+# The parser data_papers_records replaced, each line was checked for every
+# TOPKEY and each paper built up as one string, then split into lines.
+def records_reference(filename):
+    records = []
+    with open(filename, "r") as file:
+        curr_paper = ""
+        curr_line = file.readline()
+        while curr_line:
+            if curr_line[0] == "#":
+                curr_line = file.readline()
+                continue
+            if "---" in curr_line:
+                if len(curr_paper) != 0:
+                    records.append(paper_fields_reference(curr_paper))
+                curr_paper = ""
+                curr_line = file.readline()
+                continue
+            topkey_in_line = False
+            for topkey in externallinks.topkeys:
+                if topkey in curr_line:
+                    topkey_in_line = True
+            if not topkey_in_line:
+                curr_paper = curr_paper.rstrip()
+                curr_paper += curr_line.strip()
+            else:
+                curr_paper += curr_line.lstrip()
+            curr_line = file.readline()
+    return records
+
+def paper_fields_reference(curr_paper):
+    fields = []
+    for line in curr_paper.split("\n"):
+        line = line.split(":")
+        if len(line) <= 1:
+            continue
+        line[1] = ":".join(map(str, line[1:]))
+        line[1] = line[1].replace('"',"").strip()
+        if "MARKER" in line[0]:
+            field = "MARKER"
+        elif "TYPE" in line[0]:
+            field = "TYPE"
+        elif "AUTHOR" in line[0]:
+            field = "AUTHOR"
+        elif "TITLE" in line[0] and "CTITLE" not in line[0]:
+            field = "TITLE"
+        elif "YEAR" in line[0]:
+            field = "YEAR"
+        elif "TOPKEY" in line[0]:
+            field = "TOPKEY"
+        elif "SERIAL" in line[0]:
+            field = "SERIAL"
+        elif "VOLUME" in line[0]:
+            field = "VOLUME"
+        elif "CHAPTER" in line[0] or "ARTICLE" in line[0]:
+            field = "CHAPTER"
+        elif "PAGE" in line[0]:
+            field = "PAGE"
+        elif "CTITLE" in line[0]:
+            field = "CTITLE"
+        elif "DOI" in line[0]:
+            field = "DOI"
+        elif "URL" in line[0]:
+            field = "URL"
+        elif "ABS" in line[0]:
+            field = "ABS"
+        elif "PUBLISH" in line[0]:
+            field = "PUBLISH"
+        elif "REMARK" in line[0] or "PLACE" in line[0]:
+            field = "REMARK"
+        else:
+            field = None
+        fields.append([field, line[1]])
+    return fields
+
+# Run the script given the inputs from the terminal.
+main()
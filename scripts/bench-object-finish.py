@@ -0,0 +1,119 @@
+#!  /usr/bin/env python3
+__author__ = "Bradley Huffaker"
+__email__ = "<bradley@caida.org>"
+# This software is Copyright (C) 2021 The Regents of the University of
+# California. All Rights Reserved. Permission to copy, modify, and
+# distribute this software and its documentation for educational, research
+# and non-profit purposes, without fee, and without a written agreement is
+# hereby granted, provided that the above copyright notice, this paragraph
+# and the following three paragraphs appear in all copies. Permission to
+# make commercial use of this software may be obtained by contacting:
+#
+# Office of Innovation and Commercialization
+#
+# 9500 Gilman Drive, Mail Code 0910
+#
+# University of California
+#
+# La Jolla, CA 92093-0910
+#
+# (858) 534-5815
+#
+# invent@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of
+# the University of California. The software program and documentation are
+# supplied "as is", without any accompanying services from The Regents. The
+# Regents does not warrant that the operation of the program will be
+# uninterrupted or error-free. The end-user understands that the program
+# was developed for research purposes and is advised not to rely
+# exclusively on the program for any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES,
+# INCLUDING LOST PR OFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS
+# DOCUMENTATION, EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY
+# DISCLAIMS ANY WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE
+# SOFTWARE PROVIDED HEREUNDER IS ON AN "AS IS" BASIS, AND THE UNIVERSITY OF
+# CALIFORNIA HAS NO OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
+# ENHANCEMENTS, OR MODIFICATIONS.
+
+################################## Imports #####################################
+
+import argparse
+import copy
+import gc
+import importlib.util
+import os
+import sys
+import time
+
+#################################### Header ####################################
+
+"""
+    Times data-build.py's object_finish over the objects loaded from the
+    sources/ tree.  The objects are loaded once and every run finishes a
+    fresh copy of them with empty id_create and resolver caches, so only object_finish
+    (and the tag, person and license lookups and links it makes) is timed.
+"""
+
+################################# Main Method ##################################
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-r", dest="repeat", type=int, default=5, help="number of timed runs")
+    args = parser.parse_args()
+
+    build = data_build_load()
+
+    print ("loading",build.source_dir)
+    for seconds, [type_, path, filename, info, errors] in build.sources_parse(build.sources_list(build.object_types)):
+        if len(errors) > 0:
+            continue
+        if type_ == "recipe":
+            build.object_add("Recipe", info)
+        else:
+            info["filename"] = path+"/"+filename
+            build.object_add(type_, info)
+    id_object = build.id_object
+    personName_ids = build.personName_ids
+
+    times = []
+    for i in range(args.repeat):
+        build.id_object = copy.deepcopy(id_object)
+        build.personName_ids = copy.deepcopy(personName_ids)
+        build.id_id_link = build.link_store.LinkStore()
+        # every run starts with an empty id_create cache, like a build
+        build.utils.id_create_cached.cache_clear()
+        build.resolved.clear()
+        objects = list(build.id_object.values())
+        # the garbage from the previous run isn't this run's cost
+        gc.collect()
+
+        start = time.perf_counter()
+        for obj in objects:
+            build.object_finish(obj)
+        times.append(time.perf_counter() - start)
+        print ("run %d  %.3f s" % (i, times[-1]))
+
+    times.sort()
+    print ("objects %d  min %.3f s  median %.3f s  %.1f us/object" % (
+        len(objects), times[0], times[len(times)//2], times[0]/len(objects)*1e6))
+
+############################### Helper Methods #################################
+
+# data-build.py has a dash in its name and parses sys.argv when loaded
+def data_build_load():
+    filename = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data-build.py")
+    argv = sys.argv
+    sys.argv = [filename, "-j", "1"]
+    spec = importlib.util.spec_from_file_location("data_build", filename)
+    build = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(build)
+    sys.argv = argv
+    return build
+
+# Run the script given the inputs from the terminal.
+main()
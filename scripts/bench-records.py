@@ -0,0 +1,149 @@
+#!  /usr/bin/env python3
+__author__ = "Bradley Huffaker"
+__email__ = "<bradley@caida.org>"
+# This software is Copyright (C) 2021 The Regents of the University of
+# California. All Rights Reserved. Permission to copy, modify, and
+# distribute this software and its documentation for educational, research
+# and non-profit purposes, without fee, and without a written agreement is
+# hereby granted, provided that the above copyright notice, this paragraph
+# and the following three paragraphs appear in all copies. Permission to
+# make commercial use of this software may be obtained by contacting:
+#
+# Office of Innovation and Commercialization
+#
+# 9500 Gilman Drive, Mail Code 0910
+#
+# University of California
+#
+# La Jolla, CA 92093-0910
+#
+# (858) 534-5815
+#
+# invent@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of
+# the University of California. The software program and documentation are
+# supplied "as is", without any accompanying services from The Regents. The
+# Regents does not warrant that the operation of the program will be
+# uninterrupted or error-free. The end-user understands that the program
+# was developed for research purposes and is advised not to rely
+# exclusively on the program for any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES,
+# INCLUDING LOST PR OFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS
+# DOCUMENTATION, EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY
+# DISCLAIMS ANY WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE
+# SOFTWARE PROVIDED HEREUNDER IS ON AN "AS IS" BASIS, AND THE UNIVERSITY OF
+# CALIFORNIA HAS NO OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
+# ENHANCEMENTS, OR MODIFICATIONS.
+
+################################## Imports #####################################
+
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+import lib.records as records
+
+#################################### Header ####################################
+
+"""
+    Compares the memory and access time of catalog objects kept as dicts
+    and as lib/records.py records, on a synthetic catalog shaped like the
+    data-build.py objects (about half persons, the rest papers, media and
+    datasets with their usual keys).
+"""
+
+################################# Main Method ##################################
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", dest="number", type=int, default=100000, help="number of objects")
+    parser.add_argument("-s", dest="seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    results = []
+    for name, convert in [["dict", None], ["record", records.Record]]:
+        gc.collect()
+        tracemalloc.start()
+        objects = objects_create(args.number, args.seed, convert)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        # the objects themselves, without the values they hold
+        container = 0
+        for obj in objects:
+            container += sys.getsizeof(obj)
+            if type(obj) == records.Record and obj.extra is not None:
+                container += sys.getsizeof(obj.extra)
+
+        start = time.perf_counter()
+        total = 0
+        for obj in objects:
+            if "tags" in obj:
+                total += len(obj["tags"])
+            total += len(obj["id"]) + len(obj["filename"])
+            for key, value in obj.items():
+                total += 1
+        seconds = time.perf_counter() - start
+
+        results.append([name, memory, container, seconds])
+        del objects
+
+    print ("objects %d" % (args.number))
+    for name, memory, container, seconds in results:
+        print ("%-7s %8.1f MB  %6.0f bytes/object  %5.0f of them the object  access %.3f s" % (
+            name, memory/1e6, memory/args.number, container/args.number, seconds))
+    print ("records use %.0f%% of the dict memory, %.0f%% of the dict objects' own memory" % (
+        100*results[1][1]/results[0][1], 100*results[1][2]/results[0][2]))
+
+############################### Helper Methods #################################
+
+# keys in the order the build leaves them, values are fresh strings
+object_type_keys = [
+    [.47, "Person", ["id","__typename","filename","nameLast","nameFirst","name","dateCreated","dateLastUpdated","date"]],
+    [.25, "Paper", ["__typename","type","authors","bibtexFields","resources","id","name","publisher","datePublished","date","pages","description","filename","tags","dateCreated","dateLastUpdated"]],
+    [.15, "Media", ["id","name","date","description","tags","presenters","linkedObjects","__typename","filename","pubdb_id","type","resources","dateCreated","dateLastUpdated"]],
+    [.13, "Dataset", ["id","__typename","name","description","tags","resources","licenses","filename","dateStart","date","dateCreated","dateLastUpdated"]]
+]
+
+def objects_create(number, seed, convert):
+    rand = random.Random(seed)
+    words = ["internet","topology","routing","bgp","dns","measurement","traffic","ipv6","telescope","security"]
+    objects = []
+    for i in range(number):
+        r = rand.random()
+        for share, type_, keys in object_type_keys:
+            if r < share:
+                break
+            r -= share
+        obj = {}
+        for key in keys:
+            if key == "id":
+                obj[key] = type_.lower()+":object_"+str(i)
+            elif key == "__typename":
+                obj[key] = type_
+            elif key == "filename":
+                obj[key] = "sources/"+type_.lower()+"/object_"+str(i)+".json"
+            elif key == "tags":
+                obj[key] = ["tag:"+rand.choice(words) for j in range(rand.randint(1, 5))]
+            elif key in ["authors", "presenters", "resources", "linkedObjects", "licenses"]:
+                obj[key] = [{"person":"person:"+rand.choice(words)+"__"+str(j)} for j in range(rand.randint(1, 4))]
+            elif key == "bibtexFields":
+                obj[key] = {"journal":rand.choice(words), "volume":str(rand.randint(1, 40))}
+            elif key[:4] == "date":
+                obj[key] = "%d.%02d" % (rand.randint(1995, 2021), rand.randint(1, 12))
+            else:
+                obj[key] = " ".join(rand.choice(words) for j in range(rand.randint(1, 12)))
+        if convert is not None:
+            obj = convert(obj)
+        objects.append(obj)
+    return objects
+
+# Run the script given the inputs from the terminal.
+main()
@@ -47,6 +47,7 @@ import json
 import sys
 import re
 import os
+import lib.utils as utils
 
 #################################### Header ####################################
 
@@ -80,12 +81,14 @@ def main(argv):
         filename = data_id_filename
     
     # Print all datasets listed to their paths with just IDs.
-    print_datasets(filename)
+    for file_path, data in placeholders_create(filename).items():
+        utils.file_write_changed(file_path, data)
 
 ############################### Helper Methods #################################
 
-# Print all found datasets to individual JSON objects.
-def print_datasets(filename):
+# Returns {filename: JSON} of a blank placeholder for every object listed.
+def placeholders_create(filename):
+    outputs = {}
 
     # Load the JSON file into a dictionary.
     with open(filename, "r") as f:
@@ -94,9 +97,10 @@ def print_datasets(filename):
     # Iterate over each path and make a blank JSON file for them.
     for obj in objects:
         file_path = "sources/"+obj["id"].replace(":","/",1)+"___caida.json"
-        with open(file_path, "w") as output_file:
-            output_file.write(json.dumps(obj, indent=4))
+        outputs[file_path] = json.dumps(obj, indent=4)
+    return outputs
 
 
 # Run the script given the inputs from the terminal.
-main(sys.argv[1:])
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -43,11 +43,13 @@ __email__ = "dwolfson@zeus.caida.org"
 ################################## Imports #####################################
 
 import argparse
+import io
 import json
 import sys
 import re
 import os
 import lib.utils as utils
+import lib.parse_cache as parse_cache
 
 #################################### Header ####################################
 
@@ -89,8 +91,6 @@ path_ids = "data/data_id___caida.json"
 ################################# Main Method ##################################
 
 def main(argv):
-    global path_ids
-
     parser = argparse.ArgumentParser()
     parser.add_argument("-p", type=str, default=None, dest="path", help="Path to catalog-data-caida/sources")
     parser.add_argument("-i", type=str, default=None, dest="path_ids", help="Path to a json file to map file paths to IDs.")
@@ -106,45 +106,74 @@ def main(argv):
     if not os.path.exists(source_dir):
         return
 
-    # Assign a given path_ids value, else use the default.
-    if args.path_ids != None:
-        path_ids = args.path_ids
-
+    outputs = placeholders_create(source_dir, parse_cache.snapshot_load(), path_ids_file=args.path_ids)
+    for filename, data in outputs.items():
+        utils.file_write_changed(filename, data)
+
+# Returns {filename: JSON} of the placeholders for catalog-data-caida's
+# objects and of path_ids.  snapshot is a parse_cache.snapshot_load of
+# sources, ids_added {id: filename} of the placeholders written since (by
+# pubdb_placeholder.py and externallinks_placeholder.py).
+def placeholders_create(source_dir, snapshot, ids_added={}, path_ids_file=None):
+    return placeholders_print(objects_parse(source_dir, snapshot), ids_added, path_ids_file)
+
+# Returns {id: object} of catalog-data-caida's objects that aren't in
+# snapshot.  placeholders.py parses them while the other generators run and
+# leaves out the ids those made in placeholders_print.
+def objects_parse(source_dir, snapshot):
     # store existing ids
-    add_seen_ids("sources");
+    add_seen_ids(snapshot)
 
     # Parse all .md file in the given path.
     parse_catalog_data_caida(source_dir)
+    return id_2_object
+
+# Returns {filename: JSON} of objects from objects_parse, without the ones
+# whose id is in ids_added, and of path_ids.
+def placeholders_print(objects, ids_added={}, path_ids_file=None):
+    global id_2_object
+    global path_ids
+    if path_ids_file is not None:
+        path_ids = path_ids_file
+
+    id_2_object = {}
+    for id_, obj in objects.items():
+        if id_ in ids_added:
+            print ("duplicate id",id_)
+            print ("    ",ids_added[id_])
+        else:
+            id_2_object[id_] = obj
 
     # Print all found JSON objects to individual JSON files.
-    print_datasets()
+    outputs = {}
+    print_datasets(outputs)
+    return outputs
 
 ############################### Helper Methods #################################
 
 # Add each paper's ID to seen_papers from the source/paper directory.
-def add_seen_ids(source_dir):
+def add_seen_ids(snapshot):
     global seen_ids
 
     re_placeholder = re.compile(r"___caida")
-    for fname in sorted(os.listdir(source_dir)):
-        path = source_dir+"/"+fname
-        if os.path.isdir(path):
-            type_ = fname
-            for filename in sorted(os.listdir(path)):
-                file_path = path+"/"+filename
-                if re.search("\.json$",filename,re.IGNORECASE) and not re_placeholder.search(filename):
-                    try:
-                        info = json.load(open(file_path))
-                        info["filename"] = file_path
-                        id = info["id"] = utils.id_create(info["filename"], type_, info["id"])
-                        if id in seen_id:
-                            print ("duplicate id found in\n   ",filename,"\n   ", seen_id[id])
-                        else:
-                            seen_id[id] = file_path
-                    except Exception as e:
-                        print ("\nerror",path+"/"+filename)
-                        print ("    ",e)
-                        sys.exit()
+    for path in sorted(snapshot):
+        type_ = path.split("/")[-1]
+        for entry in sorted(snapshot[path], key=lambda entry: entry[0]):
+            filename = entry[0]
+            file_path = path+"/"+filename
+            if re.search("\.json$",filename,re.IGNORECASE) and not re_placeholder.search(filename):
+                try:
+                    info = parse_cache.snapshot_json(entry)
+                    info["filename"] = file_path
+                    id = info["id"] = utils.id_create(info["filename"], type_, info["id"])
+                    if id in seen_id:
+                        print ("duplicate id found in\n   ",filename,"\n   ", seen_id[id])
+                    else:
+                        seen_id[id] = file_path
+                except Exception as e:
+                    print ("\nerror",path+"/"+filename)
+                    print ("    ",e)
+                    sys.exit()
 
 
 # Parse of all .md objects in catalog-data-caida/sources.
@@ -317,7 +346,7 @@ def parse_metadata(filename):
 
 
 # Print all found datasets to individual JSON objects.
-def print_datasets():
+def print_datasets(outputs):
     global id_2_object
     global path_ids
 
@@ -330,11 +359,10 @@ def print_datasets():
 
         # Write the JSON object to the file.
         curr_file = json.dumps(id_2_object[type_id], indent=4)
-        with open(filename, "w") as output_file:
-            output_file.write(curr_file)
+        outputs[filename] = curr_file
     
     # Print a JSON mapping all made files to their IDs.
-    with open(path_ids, "w") as output_file:
+    with io.StringIO() as output_file:
         ids = sorted(id_2_object.keys())
         output_file.write("[\n")
         for id_ in ids:
@@ -378,6 +406,8 @@ def print_datasets():
             else:
                 output_file.write("  },\n")
         output_file.write("]\n")
+        outputs[path_ids] = output_file.getvalue()
 
 # Run the script given the inputs from the terminal.
-main(sys.argv[1:])
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,118 @@
+#!  /usr/bin/env python3
+__author__ = "Bradley Huffaker"
+__email__ = "<bradley@caida.org>"
+# This software is Copyright (C) 2021 The Regents of the University of
+# California. All Rights Reserved. Permission to copy, modify, and
+# distribute this software and its documentation for educational, research
+# and non-profit purposes, without fee, and without a written agreement is
+# hereby granted, provided that the above copyright notice, this paragraph
+# and the following three paragraphs appear in all copies. Permission to
+# make commercial use of this software may be obtained by contacting:
+#
+# Office of Innovation and Commercialization
+#
+# 9500 Gilman Drive, Mail Code 0910
+#
+# University of California
+#
+# La Jolla, CA 92093-0910
+#
+# (858) 534-5815
+#
+# invent@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of
+# the University of California. The software program and documentation are
+# supplied "as is", without any accompanying services from The Regents. The
+# Regents does not warrant that the operation of the program will be
+# uninterrupted or error-free. The end-user understands that the program
+# was developed for research purposes and is advised not to rely
+# exclusively on the program for any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES,
+# INCLUDING LOST PR OFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS
+# DOCUMENTATION, EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY
+# DISCLAIMS ANY WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE
+# SOFTWARE PROVIDED HEREUNDER IS ON AN "AS IS" BASIS, AND THE UNIVERSITY OF
+# CALIFORNIA HAS NO OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
+# ENHANCEMENTS, OR MODIFICATIONS.
+
+################################## Imports #####################################
+
+import argparse
+import sys
+import time
+import lib.search as search
+
+#################################### Header ####################################
+
+"""
+    Runs catalog search queries (see sources/recipe/how_to_search_the_catalog)
+    against the files written by scripts/data-build.py and prints the ranked
+    ids.  With -b it instead runs every query in a query log, one query per
+    line, and prints the load time and the query latencies.
+"""
+
+################################# Main Method ##################################
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("query", nargs="*", help="search string")
+    parser.add_argument("-d", dest="directory", type=str, default=".", help="directory holding the data-build.py output")
+    parser.add_argument("-n", dest="limit", type=int, default=20, help="maximum number of ids printed")
+    parser.add_argument("-b", dest="benchmark", type=str, default=None, help="query log to time, one query per line")
+    parser.add_argument("-r", dest="repeat", type=int, default=5, help="times each query is run with -b")
+    args = parser.parse_args()
+
+    start = time.time()
+    catalog = search.Catalog(args.directory)
+    load_time = time.time() - start
+
+    if args.benchmark is not None:
+        benchmark(catalog, load_time, args.benchmark, args.repeat)
+    elif len(args.query) > 0:
+        try:
+            id_score = catalog.search(" ".join(args.query))
+        except ValueError as e:
+            print ("error:", e, file=sys.stderr)
+            sys.exit(1)
+        for id_, score in id_score[:args.limit]:
+            print ("%10.3f %s" % (score, id_))
+        print (len(id_score), "matches")
+    else:
+        parser.print_help()
+
+############################### Helper Methods #################################
+
+def benchmark(catalog, load_time, filename, repeat):
+    queries = []
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if len(line) > 0 and line[0] != "#":
+                queries.append(line)
+
+    print ("load %.1f ms" % (load_time*1000))
+    latencies = []
+    for query in queries:
+        times = []
+        for i in range(repeat):
+            start = time.time()
+            matches = len(catalog.search(query))
+            times.append(time.time() - start)
+        latencies.extend(times)
+        print ("%8.3f ms %6d  %s" % (min(times)*1000, matches, query))
+
+    if len(latencies) > 0:
+        latencies.sort()
+        print ("queries %d  runs %d  p50 %.3f ms  p95 %.3f ms  max %.3f ms" % (
+            len(queries), len(latencies),
+            latencies[len(latencies)//2]*1000,
+            latencies[min(len(latencies)-1, int(len(latencies)*.95))]*1000,
+            latencies[-1]*1000))
+
+# Run the script given the inputs from the terminal.
+main()
@@ -39,7 +39,11 @@
 # ENHANCEMENTS, OR MODIFICATIONS.
 __author__ = "Bradley Huffaker"
 __email__ = "<bradley@caida.org>"
+import argparse
+import hashlib
 import json
+import math
+import multiprocessing
 import sys
 import os
 import re
@@ -47,19 +51,24 @@ import time
 import datetime
 import subprocess
 import lib.utils as utils
-
-# used to plural
-import nltk
-nltk.download('wordnet')
-from nltk.stem.wordnet import WordNetLemmatizer
-Lem = WordNetLemmatizer()
+import lib.search_index as search_index
+import lib.json_stream as json_stream
+import lib.link_store as link_store
+import lib.build_profile as build_profile
+import lib.records as records
+import lib.parse_cache as parse_cache
+import lib.git_dates as git_dates
+
+# used to plural, loaded by lemmatize() on the first word missing from
+# lemma_cache_file
+Lem = None
 
 source_dir="sources"
 
 id_info = {}
 id_object = {}
 id_paper = {}
-id_id_link = {}
+id_id_link = link_store.LinkStore()
 
 id_word_score = {}
 
@@ -79,29 +88,49 @@ re_html = re.compile("<[^>]+>")
 re_id_illegal = re.compile("[^a-z^\d^A-Z]+")
 re_type_name = re.compile("([^\:]+):(.+)")
 re_readme_md = re.compile("^readme\.md$",re.IGNORECASE)
+re_json = re.compile("\.json$",re.IGNORECASE)
 
 re_date_key = re.compile("^date",re.IGNORECASE)
 re_not_digit = re.compile("[^\d]+")
 
 re_placeholder = re.compile("___")
+re_caida = re.compile("caida", re.IGNORECASE)
 
 repo_url_default = "https://github.com/CAIDA/catalog-data"
 
 
-# Weight used to create id scoring for search
-# currently not used.
-# id_score_node_weight = 20
-# id_score_link_weight = .2
+# Weight used to create id scoring for search, see id_score_get.
+# id_score_node_weight is the score of the best ranked object and
+# id_score_link_weight the link_weight of the types not in link_weight.
+id_score_node_weight = 20
+id_score_link_weight = .2
+id_score_damping = .85
 
 id_object_file = "id_object.json"
 id_id_link_file = "id_id_link.json"
 word_id_score_file = "word_id_score.json"
+word_id_score_index_file = "word_id_score.bin"
+id_score_file = "id_score.json"
+id_neighbor_index_file = "id_neighbor.bin"
+# number of ids kept per prefix for search as you type
+word_prefix_top_k = 10
 pubdb_links_file = "data/pubdb_links.json"
 personName_ids_file = "personName_ids.json"
 type_ids_file = "type_ids.json"
+build_manifest_file = "build_manifest.json"
+lemma_cache_file = "lemma_cache.json"
 
 filename_errors = {}
 
+# calls of the hot functions, counted here rather than through profile.count
+# on every call and added to the profile at the end of the build
+call_counts = {
+    "git_date_lookup":0,
+    "resolve_hit":0,
+    "resolve_miss":0,
+    "link_add":0
+}
+
 # Weights used to create word scoring for search
 weight_default = 1
 key_weight = {
@@ -131,16 +160,6 @@ type_key_w_type_w = {
             ["papers",.5],
         ]
     },
-    "papers": {
-        "key_weights": [
-            ["name", 10],
-            ["description",8]
-        ],
-        "type_weights":[ 
-            ["tags",.5],
-            ["datasets", .5]
-        ]
-    },
     "papers": {
         "key_weights": [
             ["name", 10],
@@ -153,66 +172,124 @@ type_key_w_type_w = {
     }
 }
 
+# type_key_w_type_w by __typename, used by the tfidf and bm25 scoring.
+# The key weights replace key_weight's, the link and type weights are given
+# to the names of the linked objects of those types.
+type_key_weight = {}
+type_link_weight = {}
+for types, weights in type_key_w_type_w.items():
+    type_ = types[:-1].capitalize()
+    type_key_weight[type_] = dict(key_weight)
+    type_key_weight[type_].update(weights.get("key_weights",[]))
+    type_link_weight[type_] = {}
+    for types_linked, weight in weights.get("link_weights",[]) + weights.get("type_weights",[]):
+        type_link_weight[type_][types_linked[:-1].capitalize()] = weight
+
+# weighted is the key_weight sum, tfidf and bm25 rescale it by how many
+# objects have the word, see word_id_score_rank
+scoring_engines = ["weighted", "tfidf", "bm25"]
+bm25_k1 = 1.2
+bm25_b = .75
+
 id_missing = {}
 
-if len(sys.argv) > 1 and sys.argv[1] == "-f":
-    date_lookup_force = True
-else:
-    date_lookup_force = False
+# valid object types
+object_types = set([
+    "dataset",
+    "license",
+    "person",
+    "paper",
+    "software",
+    "media",
+    "group",
+    "venue"
+])
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-f", dest="date_lookup_force", action="store_true", help="look up every date in git, ignoring the dates in "+id_object_file)
+parser.add_argument("-j", dest="jobs", type=int, default=os.cpu_count(), help="number of processes used to parse the source files")
+parser.add_argument("-i", dest="incremental", action="store_true", help="skip the build if no source file, build input or output changed since the last -i build, using "+build_manifest_file+" (otherwise everything is built again)")
+parser.add_argument("-c", dest="compact", action="store_true", help="write the JSON files without indentation")
+parser.add_argument("-z", dest="sidecars", action="append", default=[], choices=sorted(json_stream.sidecar_extension), help="also write a compressed copy of every JSON file, may be repeated")
+parser.add_argument("-s", dest="scoring", choices=scoring_engines, default="weighted", help="how words are scored")
+parser.add_argument("-m", dest="score_min", type=float, default=None, help="drop the word scores below this")
+parser.add_argument("-b", dest="word_index", action="store_true", help="also write the words as a binary index with a prefix trie to "+word_id_score_index_file)
+parser.add_argument("-k", dest="hop2", action="store_true", help="also index the ids two links away in "+id_neighbor_index_file)
+parser.add_argument("-r", dest="records", action="store_true", help="keep the objects in __slots__ records instead of dicts while building")
+parser.add_argument("-n", dest="parse_cache_skip", action="store_true", help="parse every source file, ignoring and not updating "+parse_cache.cache_file)
+parser.add_argument("-p", dest="profile", type=str, default=None, help="write per phase timings, memory peaks, the slowest files and call counts to this JSON file")
+args = parser.parse_args()
+if "zstd" in args.sidecars and json_stream.zstandard is None:
+    parser.error("-z zstd needs the zstandard package")
+
+profile = build_profile.Profile(args.profile is not None)
 
 def main():
 
+    profile.phase("id_date_load")
     id_date_load(id_object_file)
 
-    # valid object types
-    object_types = set([
-        "dataset",
-        "license",
-        "person",
-        "paper",
-        "software",
-        "media",
-        "group",
-        "venue"
-    ])
+    manifest = None
+    if args.incremental:
+        profile.phase("manifest_load")
+        manifest = manifest_load(build_manifest_file)
+        if manifest_current(manifest):
+            print ("no changes since the last build, skipping")
+            return
 
     #######################
     #######################
+    profile.phase("load")
     seen_id = {}
-    for fname in sorted(os.listdir(source_dir)):
-        path = source_dir+"/"+fname
-        if fname == "solution" or fname == "recipe":
-            obj = recipe_process(path)
-        elif fname in object_types:
-            print ("loading",path)
-            type_ = fname
-            for filename in sorted(os.listdir(path)):
-                if re.search("\.json$",filename,re.IGNORECASE):
-                    try:
-                        info = json.load(open(path+"/"+filename))
-                        info["filename"] = path+"/"+filename
-                        obj = object_add(type_,info)
-                        id = obj["id"]
-                        if id in seen_id:
-                            print ("duplicate id found in\n   ",filename,"\n   ", seen_id[id])
-                        else:
-                            seen_id[id] = filename
-                        if obj is None:
-                            print ("parse error   ",path+"/"+filename)
-                    except Exception as e:
-                        print ("\nerror",path+"/"+filename)
-                        print ("    ",e)
-                        sys.exit(1)
-        else:
-            obj = None
-
+    path_loading = None
+    source_cache = None if args.parse_cache_skip else parse_cache.ParseCache()
+    for seconds, [type_, path, filename, info, errors] in sources_parse(sources_list(object_types), source_cache):
+        profile.file_add(path+"/"+filename, seconds)
+        if type_ == "recipe":
+            for error in errors:
+                error_add(path+"/"+filename, error)
+            if len(errors) == 0:
+                object_add("Recipe", info)
+            continue
 
+        if path != path_loading:
+            print ("loading",path)
+            path_loading = path
+        try:
+            if len(errors) > 0:
+                raise ValueError(errors[0])
+            info["filename"] = path+"/"+filename
+            obj = object_add(type_,info)
+            id = obj["id"]
+            if id in seen_id:
+                print ("duplicate id found in\n   ",filename,"\n   ", seen_id[id])
+            else:
+                seen_id[id] = filename
+            if obj is None:
+                print ("parse error   ",path+"/"+filename)
+        except Exception as e:
+            print ("\nerror",path+"/"+filename)
+            print ("    ",e)
+            sys.exit(1)
+    if source_cache is not None:
+        profile.count("parse_cache_hit", source_cache.hits)
+        profile.count("parse_cache_miss", source_cache.misses)
+        source_cache.write()
+
+    profile.phase("object_finish")
     for obj in list(id_object.values()):
+        start = time.perf_counter()
         object_finish(obj)
+        profile.file_add(obj.get("filename", obj["id"]), time.perf_counter() - start)
 
+    profile.phase("dates")
     print ("adding dates ( skipping '*___*' )")
     for obj in list(id_object.values()):
+        start = time.perf_counter()
         object_date_add(obj)
+        profile.file_add(obj.get("filename", obj["id"]), time.perf_counter() - start)
+
+    profile.phase("tag_caida_data")
 
     ######################
     # tag objects linked to caida_data
@@ -220,10 +297,10 @@ def main():
     tag_caida_data = "tag:used_caida_data"
     tag_obj = id_object[tag_caida_data] = {"__typename":"Tag", "id":"tag:used_caida_data", "name":"used CAIDA data", "filename":sys.argv[0]}
     ids = set()
-    for id0,id_link in id_id_link.items():
+    for id0 in id_id_link.sources():
         obj0 = id_object[id0]
         if obj0["__typename"] == "Dataset" and "tag:caida" in obj0["tags"]:
-            for id1 in id_link.keys():
+            for id1 in id_id_link.neighbors(id0):
                 obj1 = id_object[id1]
                 if obj1["__typename"] != "Tag" and "tag:caida_data" not in obj1["tags"]:
                     if "tags" not in obj1:
@@ -240,6 +317,7 @@ def main():
     #######################
     # Check that the objects are valid
     #######################
+    profile.phase("check")
 
     type_checker = {
         "Person":person_add_names,
@@ -271,6 +349,7 @@ def main():
     #######################
     # pubdb links
     #######################
+    profile.phase("pubdb_links")
     if os.path.exists(pubdb_links_file):
         print ("loading",pubdb_links_file)
         pub_links_load(pubdb_links_file)
@@ -281,11 +360,20 @@ def main():
     #######################
     # parse out the words from the fields
     #######################
+    profile.phase("words")
     print ("adding words")
+    lemma_cache_load(lemma_cache_file)
+    string_word_freq_add(id_object.values())
     for obj in id_object.values():
+        start = time.perf_counter()
         word_scoring(obj)
+        profile.file_add(obj.get("filename", obj["id"]), time.perf_counter() - start)
+    string_word_freq.clear()
+    lemma_cache_write(lemma_cache_file)
     # Add in alternative plural/singlar
+    profile.phase("word_id_score")
     word_add_plurals()
+    word_id_score_rank(args.scoring, args.score_min)
         
     word_id_score = {}
     for id_,word_score in id_word_score.items():
@@ -297,6 +385,7 @@ def main():
     #######################
     # Remove empty arrays 
     #######################
+    profile.phase("cleanup")
     print ("removing empty obj arrays")
     for obj in id_object.values():
         keys = []
@@ -327,25 +416,55 @@ def main():
     print ("removing private")
     remove_private(id_object, id_id_link)
 
+    profile.phase("id_score")
+    print ("ranking ids")
+    id_score = id_score_get()
+
     #######################
     # print files
     #######################
-    print ("writing",id_object_file)
-    json.dump(id_object, open(id_object_file,"w"),indent=4)
-
-    print ("writing",personName_ids_file)
-    json.dump(personName_ids, open(personName_ids_file,"w"),indent=4)
-
-    print ("writing",type_ids_file)
-    json.dump(type_ids, open(type_ids_file,"w"),indent=4)
-
-    print ("writing",id_id_link_file)
-    json.dump(id_id_link, open(id_id_link_file,"w"),indent=4)
-
-    print ("writing",word_id_score_file)
-    json.dump(word_id_score, open(word_id_score_file,"w"),indent=4)
+    profile.phase("write")
+    # records only become dicts here, one at a time
+    id_object_items = ((id_, records.object_dict(obj)) for id_, obj in id_object.items())
+    for filename, entries in [
+            [id_object_file, id_object_items],
+            [personName_ids_file, personName_ids.items()],
+            [type_ids_file, type_ids.items()],
+            [id_id_link_file, id_id_link.items()],
+            [word_id_score_file, word_id_score.items()],
+            [id_score_file, id_score.items()]]:
+        if manifest is None:
+            print ("writing",filename)
+        written = json_stream.json_write(filename, entries, args.compact, args.sidecars, manifest is not None)
+        if manifest is not None:
+            print ("writing" if written else "unchanged",filename)
     #json.dump(word_score_id, open(word_id_score_file,"w"))
 
+    profile.phase("write_index")
+    if args.word_index:
+        print ("writing",word_id_score_index_file)
+        search_index.word_index_write(word_id_score_index_file, word_id_score, word_prefix_top_k)
+
+    print ("writing",id_neighbor_index_file)
+    id_type = {}
+    for id_, obj in id_object.items():
+        id_type[id_] = obj["__typename"].lower()
+    id_neighbors = {}
+    for id_ in id_id_link.sources():
+        id_neighbors[id_] = list(id_id_link.neighbors(id_))
+    search_index.neighbor_index_write(id_neighbor_index_file, id_type, id_neighbors, args.hop2)
+
+    if manifest is not None:
+        print ("writing",build_manifest_file)
+        manifest_write(build_manifest_file)
+
+    stats = utils.id_create_stats()
+    print ("id_create cache: %d hits, %d misses" % (stats["hits"], stats["misses"]))
+    profile.count("id_create", stats["hits"] + stats["misses"])
+    for name, number in call_counts.items():
+        profile.count(name, number)
+    profile.count("lemmatize", word_lemma_added)
+
 ###########################
 def error_add(filename, message):
     if filename not in filename_errors:
@@ -383,17 +502,11 @@ def object_date_add(obj):
     today = datetime.date.today().strftime("%Y-%m")
 
     for key in ["dateCreated","dateLastUpdated"]:
-        if not date_lookup_force and obj["id"] in id_date and key in id_date[obj["id"]]:
+        if not args.date_lookup_force and obj["id"] in id_date and key in id_date[obj["id"]]:
             obj[key] = id_date[obj["id"]][key]
         else:
             if not re_placeholder.search(obj["filename"]):
-                if key == "dateCreated":
-                    cmd = "git log --diff-filter=A --follow --format=%aD -1 -- "
-                else:
-                    cmd = "git log --format=%aD -1 -- "
-
-                result = subprocess.check_output(cmd+" "+obj["filename"],shell=True)
-                values = result.decode().lower().split(" ")
+                values = git_date_lookup(obj["filename"], key).lower().split(" ")
             else:
                 values = []
             date = today
@@ -435,6 +548,32 @@ def object_date_add(obj):
         obj["date"] = obj["dateLastUpdated"]
     obj["date"] = utils.date_parse(obj["date"])
 
+###########################
+# git history
+#   The dates of every source file are read once, on the first date cache
+#   miss, see git_dates.py.
+###########################
+git_path_dates = None
+def git_dates_load():
+    try:
+        return git_dates.dates_load(source_dir)
+    except (subprocess.CalledProcessError, OSError) as e:
+        error_add("git log", e.__str__())
+        return {}
+
+def git_date_lookup(filename, key):
+    global git_path_dates
+    call_counts["git_date_lookup"] += 1
+    if git_path_dates is None:
+        git_path_dates = git_dates_load()
+
+    if filename in git_path_dates:
+        created, updated = git_path_dates[filename]
+        if key == "dateCreated":
+            return created or ""
+        return updated
+    return ""
+
 ###########################
 
 def data_print(): 
@@ -456,6 +595,8 @@ def data_print():
 
 
 def object_add(type_, info): 
+    if args.records and type(info) == dict:
+        info = records.Record(info)
     info["__typename"] = type_ = type_.title()
 
     error = False
@@ -469,7 +610,7 @@ def object_add(type_, info):
         else:
             info["id"] = utils.id_create(info["filename"], info["__typename"],info["id"])
     else:
-        error_add(info["filename"], "failed to find name:"+json.dumps(info))
+        error_add(info["filename"], "failed to find name:"+json.dumps(info, default=records.json_default))
         error = True
     
     if type_ == "paper":
@@ -505,103 +646,170 @@ def object_finish(obj):
         obj["tags"] = []
 
 
-    for key,value in obj.items():
-        if key == "tags":
-            for i,tag in enumerate(obj["tags"]):
-                o = object_lookup_type_name(obj["filename"], "tag",tag)
-                if o is not None:
-                    tag = obj["tags"][i] = o["id"]
-                    link_add(obj,tag)
-
-        #elif key == "resources":
-        #    for resource in obj["resources"]:
-        #        for i,tag in enumerate(resource[key]):
-        #            resource["tags"][i] = object_lookup_type_name("tag",tag)["id"]
-
-        elif re_date_key.search(key) and type(obj[key]) == str:
-            date = utils.date_parse(obj[key])
-            if date:
-                obj[key] = date
-            #values = re_not_digit.split(obj[key])
-            #digits = ["1990","01","01","00","00","00"]
-            #for i,value in enumerate(values):
-                #digits[i] = value
-            ##dt = datetime.datetime.strptime(" ".join(digits), "%Y %m %d %H %M %S")
-            #date = int(time.mktime(dt.timetuple()))
-            #obj[key] = "%s/%s/%s %s:%s:%s" % (digits[0],digits[1],digits[2],digits[3],digits[4],digits[5])
-
-        #elif obj["__typename"] == "Venue" and key == "dates":
-        #    for date_url in obj[key]:
-        #        venue_add_date_url(obj,date_url["date"],date_url["url"])
-
-        elif key == "persons" or key == "venues" or key == "presenters" or key == "authors":
-                dirty = []
-                i = 0
-                persons = set()
-                while i < len(obj[key]):
-                    person_org = obj[key][i]
-                    error = False
-                    if type(person_org) == dict:
-                        caida = False
-                        if "organizations" in person_org:
-                            for org in person_org["organizations"]:
-                                if re.search("caida", org, re.IGNORECASE):
-                                    caida = True
-                        for k in ["person","presenter"]:
-                            if k in person_org:
-                                person = person_lookup_id(obj["filename"],person_org[k])
-                                persons.add(person["id"])
-                                if person is not None:
-                                    if caida:
-                                        if "tags" not in person:
-                                            person["tags"] = ["caida"]
-                                        else:
-                                            person["tags"].append("caida")
-                                    person_org[k] = person["id"]
-                                else:
-                                    error = True
-                    elif type(person_org) == str and person_org[7:] == "person:":
-                        person = person_lookup_id(obj["filename"],person_org)
-                        persons.add(person["id"])
-                        if person is not None:
-                            obj[key][i] = person["id"]
-                        else:
-                            error = True
-                    if error:
-                        del obj[key][i]
+    for key in obj.keys():
+        if key in object_finish_key_handler:
+            handler = object_finish_key_handler[key]
+        else:
+            handler = object_finish_key_handler[key] = object_finish_handler_get(key)
+        handler(obj, key)
+
+# Picks the handler of keys not in object_finish_key_handler, once per key.
+# Date keys holding something other than a string are treated like any
+# other key.
+def object_finish_handler_get(key):
+    if re_date_key.search(key):
+        return object_finish_date
+    return object_finish_other
+
+def object_finish_tags(obj, key):
+    for i,tag in enumerate(obj["tags"]):
+        o = object_lookup_type_name(obj["filename"], "tag",tag)
+        if o is not None:
+            tag = obj["tags"][i] = o["id"]
+            link_add(obj,tag)
+
+    #elif key == "resources":
+    #    for resource in obj["resources"]:
+    #        for i,tag in enumerate(resource[key]):
+    #            resource["tags"][i] = object_lookup_type_name("tag",tag)["id"]
+
+def object_finish_date(obj, key):
+    if type(obj[key]) != str:
+        object_finish_other(obj, key)
+        return
+    date = utils.date_parse(obj[key])
+    if date:
+        obj[key] = date
+    #values = re_not_digit.split(obj[key])
+    #digits = ["1990","01","01","00","00","00"]
+    #for i,value in enumerate(values):
+        #digits[i] = value
+    ##dt = datetime.datetime.strptime(" ".join(digits), "%Y %m %d %H %M %S")
+    #date = int(time.mktime(dt.timetuple()))
+    #obj[key] = "%s/%s/%s %s:%s:%s" % (digits[0],digits[1],digits[2],digits[3],digits[4],digits[5])
+
+    #elif obj["__typename"] == "Venue" and key == "dates":
+    #    for date_url in obj[key]:
+    #        venue_add_date_url(obj,date_url["date"],date_url["url"])
+
+def object_finish_persons(obj, key):
+    dirty = []
+    i = 0
+    persons = set()
+    while i < len(obj[key]):
+        person_org = obj[key][i]
+        error = False
+        if type(person_org) == dict:
+            caida = False
+            if "organizations" in person_org:
+                for org in person_org["organizations"]:
+                    if re_caida.search(org):
+                        caida = True
+            for k in ["person","presenter"]:
+                if k in person_org:
+                    person = person_lookup_id(obj["filename"],person_org[k])
+                    persons.add(person["id"])
+                    if person is not None:
+                        if caida:
+                            if "tags" not in person:
+                                person["tags"] = ["caida"]
+                            else:
+                                person["tags"].append("caida")
+                        person_org[k] = person["id"]
                     else:
-                        i += 1
-                for person_id in persons:
-                    link_add(obj, person_id)
-                    personName_add(obj, person_id)
-        elif key == "licenses":
-            licenses = list(obj[key])
-            for i,id_ in enumerate(licenses):
-                id_2 = utils.id_create(obj["filename"],"license",id_);
-                if id_2 not in id_object:
-                    name = id_[8:]
-                    object_add("License", {
-                        "id":id_2,
-                        "name":id_[8:],
-                        "filename":obj["filename"]
-                    })
-                obj[key][i] = id_object[id_2]["id"]
+                        error = True
+        elif type(person_org) == str and person_org[7:] == "person:":
+            person = person_lookup_id(obj["filename"],person_org)
+            persons.add(person["id"])
+            if person is not None:
+                obj[key][i] = person["id"]
+            else:
+                error = True
+        if error:
+            del obj[key][i]
         else:
-            obj[key] = tag_convert(obj["filename"], obj[key])
+            i += 1
+    for person_id in persons:
+        link_add(obj, person_id)
+        personName_add(obj, person_id)
+
+def object_finish_licenses(obj, key):
+    licenses = list(obj[key])
+    for i,id_ in enumerate(licenses):
+        id_2 = utils.id_create(obj["filename"],"license",id_);
+        if id_2 not in id_object:
+            name = id_[8:]
+            object_add("License", {
+                "id":id_2,
+                "name":id_[8:],
+                "filename":obj["filename"]
+            })
+        obj[key][i] = id_object[id_2]["id"]
+
+# only lists and dicts can hold tags, other values are left as they are
+def object_finish_other(obj, key):
+    value = obj[key]
+    if type(value) == dict or type(value) == list:
+        obj[key] = tag_convert(obj["filename"], value)
+
+object_finish_key_handler = {
+    "tags":object_finish_tags,
+    "persons":object_finish_persons,
+    "venues":object_finish_persons,
+    "presenters":object_finish_persons,
+    "authors":object_finish_persons,
+    "licenses":object_finish_licenses
+}
 
 
+###########################
+# resolver memo
+#   The same tag, person and object references turn up in hundreds of
+#   files.  Every reference resolved is kept with the id it resolved to,
+#   or the error it failed with, so a repeat is a dict lookup.  The error
+#   is added again for the repeat's file.
+###########################
+resolved = {}
+
+def resolved_get(filename, key):
+    if key not in resolved:
+        return False, None
+    id_, error = resolved[key]
+    if error is not None:
+        call_counts["resolve_hit"] += 1
+        error_add(filename, error)
+        return True, None
+    if id_ in id_object:
+        call_counts["resolve_hit"] += 1
+        return True, id_object[id_]
+    return False, None
+
+def resolved_add(key, obj, error=None):
+    call_counts["resolve_miss"] += 1
+    if error is not None:
+        resolved[key] = [None, error]
+    elif obj is not None:
+        resolved[key] = [obj["id"], None]
+    return obj
+
 def person_lookup_id(filename, id_):
     if (type(id_) != str):
         error_add(filename, "person id wrong type found:"+str(type(id_))+" wanted str : "+json.dumps(id_))
         return None
 
+    key = ("person", id_)
+    found, person = resolved_get(filename, key)
+    if found:
+        return person
+
     id_ = id_.lower()
     if ":" in id_:
         if "person:" in id_:
             person = object_lookup_id(filename, id_)
         else:
-            error_add(filename, "expected person found "+id_)
-            return None
+            error = "expected person found "+id_
+            error_add(filename, error)
+            return resolved_add(key, None, error)
     else:
         person = object_lookup_id(filename, "person:"+id_)
     if person is None:
@@ -610,20 +818,32 @@ def person_lookup_id(filename, id_):
             "filename":obj["filename"] 
         }
         person = object_add("Person", person_add_names(person))
-    return person
+    return resolved_add(key, person)
 
 def object_lookup_type_name(filename, type_,name):
+    key = ("type_name", type_, name)
+    found, obj = resolved_get(filename, key)
+    if found:
+        return obj
+
     if type_ == name[0:(len(type_)+1)]:
         name = name[(len(type_)+1):]
     id_ = utils.id_create(filename, type_,name)
-    return object_lookup({
+    return resolved_add(key, object_lookup({
         "id":id_,
         "filename":filename, 
         "__typename":type_,
         "name":name
-    })
+    }))
 
 def object_lookup_id(filename, id_):
+    key = ("id", id_)
+    found, obj = resolved_get(filename, key)
+    if found:
+        return obj
+    return resolved_add(key, object_lookup_id_resolve(filename, id_))
+
+def object_lookup_id_resolve(filename, id_):
     id_ = utils.id_create(filename,None,id_)
     if id_ in id_object:
         return id_object[id_]
@@ -655,7 +875,7 @@ def object_lookup(info):
             print ("no id or name,_typename",info)
             sys.exit()
     else:
-        if not re.search("^"+type_,info["id"]):
+        if not info["id"].startswith(type_):
             info["id"] = info["__typename"]+":"+info["id"]
     id_ = info["id"]
     if id_ not in id_object:
@@ -692,6 +912,7 @@ def personName_add(obj, person_id):
         personName_ids[name].add(i)
 
 def link_add(obj,info,p=False):
+    call_counts["link_add"] += 1
 
     if type(info) == str:
         to_original = info
@@ -717,89 +938,162 @@ def link_add(obj,info,p=False):
     info["from"] = obj["id"]
     for a_b in [["from","to"],["to","from"]]:
         a,b = a_b
-        a_id = info[a]
-        b_id = info[b]
-        link = {
-            "from":a_id,
-            "to":b_id
-            }
+        labels = []
         if a+"_label" in info:
-            link["from_label"] = info[a+"_label"]
+            labels.append(["from_label", info[a+"_label"]])
         if b+"_label" in info:
-            link["to_label"] = info[b+"_label"]
+            labels.append(["to_label", info[b+"_label"]])
         if "label" in info:
-            link["label"] = info["label"]
-
-        if a_id not in id_id_link:
-            id_id_link[a_id] = {}
-        if b_id in id_id_link[a_id]:
-            for key,value in link.items():
-                if key not in id_id_link[a_id][b_id]:
-                    id_id_link[a_id][b_id][key] = value
-        else:
-            id_id_link[a_id][b_id] = link
+            labels.append(["label", info["label"]])
+        id_id_link.add(info[a], info[b], labels)
     return True
 
 #############################
+# source loading
+#   The source files are listed in the order the build has always loaded
+#   them, parsed across a process pool, and handed back in that same order
+#   so object_add sees them exactly as a serial load would.
+#############################
 
-def recipe_process(path):
-    rep_url = get_url()+"/blob/master/"
-    recipe_dir = set()
-    skipped = []
-    obj = None
-    for root, dirs, files in os.walk(path):
-        error = False
-        if re.search(path+"/[^/]+$",root):
-            for fname in files:
-                if re_readme_md.search(fname):
-                #if root in recipe_dir and re_readme_md.search(fname):
-                    filename = root +"/"+fname
-                    info = None
-                    with open(filename) as f:
-                        inside = False
+def sources_list(object_types):
+    sources = []
+    for fname in sorted(os.listdir(source_dir)):
+        path = source_dir+"/"+fname
+        if fname == "solution" or fname == "recipe":
+            rep_url = get_url()+"/blob/master/"
+            for root, dirs, files in os.walk(path):
+                if re.search(path+"/[^/]+$",root):
+                    for fname in files:
+                        if re_readme_md.search(fname):
+                        #if root in recipe_dir and re_readme_md.search(fname):
+                            sources.append(["recipe", root, fname, rep_url])
+        elif fname in object_types:
+            for filename in sorted(os.listdir(path)):
+                if re_json.search(filename):
+                    sources.append([fname, path, filename, None])
+    return sources
+
+# yields [seconds, result], the time it took to parse the file (or to
+# find it in the cache).  Only the files the cache doesn't have are parsed,
+# the results are cached before object_add gets to change them.
+def sources_parse(sources, cache=None):
+    if cache is None:
+        for seconds, result in sources_parse_all(sources):
+            yield seconds, result
+        return
+
+    cached = []
+    parse = []
+    for source in sources:
+        start = time.perf_counter()
+        found, value, content = cache.lookup(source_filename(source), source_kind(source))
+        cached.append([time.perf_counter() - start, found, value, content])
+        if not found:
+            parse.append(source)
+
+    parsed = sources_parse_all(parse)
+    for source, [seconds, found, value, content] in zip(sources, cached):
+        type_, path, filename, rep_url = source
+        if found:
+            yield seconds, [type_, path, filename, value, []]
+            continue
+        seconds_parse, result = next(parsed)
+        info, errors = result[3:]
+        if len(errors) == 0:
+            cache.add(source_filename(source), source_kind(source), info, content)
+        yield seconds + seconds_parse, result
+    parsed.close()
+
+def sources_parse_all(sources):
+    if args.jobs <= 1 or len(sources) < 2:
+        for source in sources:
+            yield source_parse_timed(source)
+    else:
+        chunksize = len(sources)//(args.jobs*4) + 1
+        with multiprocessing.Pool(args.jobs) as pool:
+            for result in pool.imap(source_parse_timed, sources, chunksize):
+                yield result
+
+def source_filename(source):
+    type_, path, filename, rep_url = source
+    return path+"/"+filename
+
+# a recipe's parse depends on the repository url and on this script
+source_script_hash = None
+def source_kind(source):
+    global source_script_hash
+    type_, path, filename, rep_url = source
+    if type_ != "recipe":
+        return "json"
+    if source_script_hash is None:
+        with open(__file__,"rb") as f:
+            source_script_hash = hashlib.sha1(f.read()).hexdigest()
+    return "recipe "+rep_url+" "+source_script_hash
+
+def source_parse_timed(source):
+    start = time.perf_counter()
+    result = source_parse(source)
+    return time.perf_counter() - start, result
+
+# runs inside the pool, so errors are returned rather than added
+def source_parse(source):
+    type_, path, filename, rep_url = source
+    if type_ == "recipe":
+        info, errors = recipe_parse(path, path+"/"+filename, rep_url)
+        return type_, path, filename, info, errors
+
+    try:
+        with open(path+"/"+filename) as f:
+            info = json.load(f)
+        return type_, path, filename, info, []
+    except Exception as e:
+        return type_, path, filename, None, [e.__str__()]
+
+def recipe_parse(root, filename, rep_url):
+    info = None
+    errors = []
+    with open(filename) as f:
+        inside = False
+        data = None
+        for line in f:
+            # process content after JSON 
+            if info is not None:
+                line = replace_markdown_urls(rep_url+root, line)
+                #if re_markdown_url.search(line):
+                    #print (line.rstrip())
+                info["content"] += line
+
+
+            # process JSON 
+            elif re.search("~~~",line):
+                if inside:
+                    if data == "":
+                        break
+                    try:
+                        info = json.loads(data)
+                        if "id" not in info:
+                            info["id"] = root.split("/")[-1]
+                        info["id"] = "recipe:"+info["id"]
+                        info["filename"] = filename
+                        info["__typename"] = "Recipe"
+                        info["content"] = ""
                         data = None
-                        for line in f:
-                            # process content after JSON 
-                            if info is not None:
-                                line = replace_markdown_urls(rep_url+root, line)
-                                #if re_markdown_url.search(line):
-                                    #print (line.rstrip())
-                                info["content"] += line
-
-
-                            # process JSON 
-                            elif re.search("~~~",line):
-                                if inside:
-                                    if data == "":
-                                        break
-                                    try:
-                                        info = json.loads(data)
-                                        if "id" not in info:
-                                            info["id"] = root.split("/")[-1]
-                                        info["id"] = "recipe:"+info["id"]
-                                        info["filename"] = filename
-                                        info["__typename"] = "Recipe"
-                                        info["content"] = ""
-                                        data = None
-                                    except ValueError as e:
-                                        error = True
-                                        error_add(filename, e.__str__())
-                                        #print (e)
-                                        #print ("parse failure",data)
-                                        break
-                                else:
-                                    data = ""
-                                inside = not inside
-                            elif data is not None:
-                                data += line
-                    errors = []
-                    if info is None:
-                        info = {}
-                    #if "visibility" not in info or "public" != info["visibility"].lower():
-                        #errors.append("invisible")
-
-                    if not error: 
-                        object_add("Recipe", info)
+                    except ValueError as e:
+                        errors.append(e.__str__())
+                        #print (e)
+                        #print ("parse failure",data)
+                        break
+                else:
+                    data = ""
+                inside = not inside
+            elif data is not None:
+                data += line
+    if info is None:
+        info = {}
+    #if "visibility" not in info or "public" != info["visibility"].lower():
+        #errors.append("invisible")
+    return info, errors
+
 re_markdown_url = re.compile("^(.*\[[^\]]+\]\(\s*)([^\)]+)(\).*)")
 def replace_markdown_urls(repo_url, line):
     m = re_markdown_url.search(line)
@@ -886,33 +1180,143 @@ def object_checker(obj):
 def word_scoring(obj, recursive=False):
     global singlar_plural
     word_score = {}
+    key_weight_ = key_weight
+    if args.scoring != "weighted" and obj["__typename"] in type_key_weight:
+        key_weight_ = type_key_weight[obj["__typename"]]
     for key,value in obj.items():
-        if key in key_weight:
-            weight = key_weight[key]
+        if key in key_weight_:
+            weight = key_weight_[key]
         else:
             weight = weight_default
 
         if weight == 0:
             continue
 
-        word_freq = word_freq_get(value)
-
-        for word_original,freq in word_freq.items():
-            if len(word_original) > 1:
-                word_original = word_original.lower()
-                first = True
-                for word in [word_original, Lem.lemmatize(word_original)]:
-                    if word and (first or word != word_original):
-                        first = False
-                        if word != word_original:
-                            singular_plural[word] = word_original
-                        if word not in word_score:
-                            word_score[word] = weight*freq
-                        else:
-                            word_score[word] += weight*freq 
+        word_score_add(word_score, word_freq_get(value), weight)
+
+    for id_, weight in word_score_links(obj):
+        word_score_add(word_score, word_freq_get(id_object[id_].get("name", "")), weight)
 
     id_word_score[obj["id"]] = word_score
 
+# linked objects whose names are scored, with their weight
+def word_score_links(obj):
+    links = []
+    if args.scoring != "weighted" and obj["__typename"] in type_link_weight:
+        type_weight = type_link_weight[obj["__typename"]]
+        for id_ in id_id_link.neighbors(obj["id"]):
+            type_ = id_object[id_]["__typename"]
+            if type_ in type_weight:
+                links.append([id_, type_weight[type_]])
+    return links
+
+def word_score_add(word_score, word_freq, weight):
+    for word_original,freq in word_freq.items():
+        if len(word_original) > 1:
+            word_original = word_original.lower()
+            score = weight*freq
+            if word_original not in word_score:
+                word_score[word_original] = score
+            else:
+                word_score[word_original] += score
+
+            if word_original in word_lemma:
+                word = word_lemma[word_original]
+            else:
+                word = lemmatize(word_original)
+            if word and word != word_original:
+                singular_plural[word] = word_original
+                if word not in word_score:
+                    word_score[word] = score
+                else:
+                    word_score[word] += score
+
+###########################
+# lemma cache
+#   The lemma of every word seen is kept in lemma_cache_file, so wordnet
+#   is only loaded (and only downloaded if nltk can't find it) when a
+#   build meets a new word.
+###########################
+word_lemma = {}
+word_lemma_added = 0
+
+def lemma_cache_load(filename):
+    global word_lemma
+    if os.path.exists(filename):
+        try:
+            word_lemma = json.load(open(filename,"r"))
+        except ValueError as e:
+            print ("ignoring",filename,e)
+
+def lemma_cache_write(filename):
+    if word_lemma_added == 0:
+        return
+    print ("writing",filename,"(%d new words)" % (word_lemma_added))
+    with open(filename+".tmp","w") as f:
+        json.dump(word_lemma, f, indent=0, sort_keys=True)
+    os.replace(filename+".tmp", filename)
+
+def lemmatize(word):
+    global Lem, word_lemma_added
+    if word in word_lemma:
+        return word_lemma[word]
+    if Lem is None:
+        Lem = lemmatizer_load()
+    lemma = word_lemma[word] = Lem.lemmatize(word)
+    word_lemma_added += 1
+    return lemma
+
+def lemmatizer_load():
+    print ("loading wordnet")
+    import nltk
+    try:
+        nltk.data.find("corpora/wordnet")
+    except LookupError:
+        nltk.download("wordnet")
+    from nltk.stem.wordnet import WordNetLemmatizer
+    return WordNetLemmatizer()
+
+###########################
+# tokenizing
+#   Most strings (names, tags, venues, urls) turn up in many objects, so
+#   before scoring every distinct string of the objects being scored is
+#   split into words once and word_freq_get reuses the result.
+###########################
+string_word_freq = {}
+
+def string_word_freq_add(objects):
+    strings = []
+    for obj in objects:
+        for key, value in obj.items():
+            if key not in key_weight or key_weight[key] != 0:
+                strings_get(value, strings)
+    for string in strings:
+        if string not in string_word_freq and string not in id_object:
+            string_word_freq[string] = words_additional(string_words_freq(string))
+
+def strings_get(value, strings):
+    type_ = type(value)
+    if str == type_:
+        strings.append(value)
+    elif list == type_:
+        for val in value:
+            strings_get(val, strings)
+    elif dict == type_:
+        for val in value.values():
+            strings_get(val, strings)
+
+def string_words_freq(value):
+    word_freq = {}
+    words = re_not_word.split(re_html.sub("",value.lower() ))
+    total = len(words)
+    for word in words:
+        # a word already counted is known to be valid
+        if word in word_freq:
+            word_freq[word] += 1/total
+        elif len(word) > 0 and re_word.search(word):
+            word_freq[word] = 1/total
+    return word_freq
+
 seen_value = set()
 re_not_letter = re.compile("[^a-z^A-z]+")
 re_not_empty = re.compile("[^\s]")
@@ -920,6 +1324,8 @@ def word_freq_get(value):
     word_freq = {}
     type_ = type(value)
     if str == type_:
+        if value in string_word_freq:
+            return string_word_freq[value]
         if value in id_object:
             obj = id_object[value];
             t = obj["__typename"]
@@ -937,16 +1343,7 @@ def word_freq_get(value):
                 if key in obj:
                     word_freq[obj[key].lower()] = 1.0/len(keys)
         else:
-            words = re_not_word.split(re_html.sub("",value.lower() ))
-            total = len(words)
-            for word in words:
-                if len(word) > 0 and re_word.search(word): 
-                    if word in word_freq:
-                        word_freq[word] += 1/total
-                    else:
-                        word_freq[word] = 1/total
-                #else:
-                #    print (word)
+            word_freq = string_words_freq(value)
 
     elif list == type_ or dict == type_:
         if list == type_:
@@ -963,7 +1360,10 @@ def word_freq_get(value):
                     word_freq[w] = 1
     #print (json.dumps(word_freq,indent=4))
 
-    # additoinal words
+    return words_additional(word_freq)
+
+# additoinal words
+def words_additional(word_freq):
     words = list(word_freq.keys())
     for word in words:
         if re_not_letter.search(word):
@@ -996,35 +1396,168 @@ def word_add_plurals():
             else:
                 word_score[plural] = score
 
+# Rescales every object's word scores, taken as the term frequencies, by the
+# number of objects with the word:
+#   tfidf   tf * log(N/df)
+#   bm25    idf * tf*(k1+1) / (tf + k1*(1 - b + b*length/average length))
+#           with idf = log(1 + (N - df + .5)/(df + .5)) and length the sum
+#           of the object's scores
+# then drops the scores below score_min.
+def word_id_score_rank(scoring, score_min):
+    if scoring != "weighted":
+        word_df = {}
+        length_total = 0
+        for word_score in id_word_score.values():
+            for word, score in word_score.items():
+                if word in word_df:
+                    word_df[word] += 1
+                else:
+                    word_df[word] = 1
+                length_total += score
+        n = len(id_word_score)
+        length_average = length_total/n if n > 0 else 1
+
+        word_idf = {}
+        for word, df in word_df.items():
+            if scoring == "tfidf":
+                word_idf[word] = math.log(n/df)
+            else:
+                word_idf[word] = math.log(1 + (n - df + .5)/(df + .5))
+
+        for id_, word_score in id_word_score.items():
+            if scoring == "tfidf":
+                for word, score in word_score.items():
+                    word_score[word] = score*word_idf[word]
+            else:
+                # the object's length normalization, the same for all its words
+                norm = bm25_k1*(1 - bm25_b + bm25_b*sum(word_score.values())/length_average)
+                for word, score in word_score.items():
+                    word_score[word] = word_idf[word]*score*(bm25_k1 + 1)/(score + norm)
+
+    if score_min is not None:
+        for id_, word_score in id_word_score.items():
+            for word in [word for word, score in word_score.items() if score < score_min]:
+                del word_score[word]
+
+###########################
+# id scoring
+#   A PageRank over the links, where an object passes its rank on to its
+#   neighbours in proportion to their type's link_weight, so objects that
+#   many (well linked) papers and datasets point to rank higher.  Scaled so
+#   the best ranked object scores id_score_node_weight.  Search adds it to
+#   the word scores.
+###########################
+def id_score_get():
+    def node_weight(id_):
+        type_ = id_object[id_]["__typename"]
+        return link_weight[type_] if type_ in link_weight else id_score_link_weight
+
+    id_rank = id_id_link.rank(list(id_object.keys()), node_weight, id_score_damping)
+    rank_max = max(id_rank.values()) if len(id_rank) > 0 else 0
+    id_score = {}
+    for id_, rank in id_rank.items():
+        id_score[id_] = id_score_node_weight*rank/rank_max
+    return id_score
+
 ###########################
 
 def is_private(obj):
     return "visibility" in obj and obj["visibility"] == "private"
 
 def remove_private(id_object, id_id_link):
-    private = []
-    for id0,id_link in id_id_link.items():
-        obj = id_object[id0]
-        if is_private(obj):
-            private.append(id0)
-        else:
-            p = []
-            for id1 in id_link.keys():
-                obj = id_object[id1]
-                if is_private(obj):
-                    p.append(id1)
-            for id1 in p:
-                del id_link[id1]
-    for id in private:
-        del id_id_link[id]
-
     private = []
     for id, obj in id_object.items():
         if is_private(obj):
             private.append(id)
+    id_id_link.remove(private)
     for id in private:
         del id_object[id]
 
+###########################
+# build manifest
+#   Records the hash of every source file, of the build inputs and the size
+#   and mtime of every output.  With -i a build whose sources, inputs and
+#   outputs all match the manifest of the last -i build is skipped.  This
+#   is not an incremental build: once anything changed everything is built
+#   again, only the output files whose content changed are rewritten.
+###########################
+build_manifest_version = 2
+
+def manifest_load(filename):
+    manifest = {
+        "version":build_manifest_version,
+        "inputs":build_inputs_hash(),
+        "files":source_files_hash()
+    }
+    if os.path.exists(filename):
+        try:
+            previous = json.load(open(filename,"r"))
+        except ValueError as e:
+            error_add(filename, e.__str__())
+            return manifest
+        if previous.get("version") == build_manifest_version and previous.get("inputs") == manifest["inputs"]:
+            manifest["previous"] = previous
+    return manifest
+
+def manifest_current(manifest):
+    if args.date_lookup_force or "previous" not in manifest:
+        return False
+    previous = manifest["previous"]
+    if previous["files"] != manifest["files"]:
+        return False
+    for filename, size_mtime in previous["outputs"].items():
+        if not os.path.exists(filename):
+            return False
+        stat = os.stat(filename)
+        if [stat.st_size, stat.st_mtime_ns] != size_mtime:
+            return False
+    return True
+
+def manifest_write(filename):
+    outputs = {}
+    files = [id_object_file, personName_ids_file, type_ids_file, id_id_link_file, word_id_score_file, id_score_file, id_neighbor_index_file]
+    if args.word_index:
+        files.append(word_id_score_index_file)
+    for output in files:
+        stat = os.stat(output)
+        outputs[output] = [stat.st_size, stat.st_mtime_ns]
+    manifest = {
+        "version":build_manifest_version,
+        "inputs":build_inputs_hash(),
+        "files":source_files_hash(),
+        "outputs":outputs
+    }
+    with open(filename,"w") as f:
+        json.dump(manifest, f)
+
+# data-build.py, every module of scripts/lib (any of them can change the
+# outputs) and the pubdb links
+def build_inputs_hash():
+    h = hashlib.sha1()
+    lib_dir = os.path.dirname(utils.__file__)
+    lib_files = [lib_dir+"/"+fname for fname in sorted(os.listdir(lib_dir)) if fname.endswith(".py")]
+    for filename in [__file__] + lib_files + [pubdb_links_file]:
+        h.update(os.path.basename(filename).encode())
+        if os.path.exists(filename):
+            with open(filename,"rb") as f:
+                h.update(f.read())
+    # the scoring and the outputs
+    h.update(json.dumps([args.scoring, args.score_min, args.compact, sorted(args.sidecars), args.word_index, args.hop2]).encode())
+    # "ongoing" dates and placeholder dates are set to this month
+    h.update(datetime.date.today().strftime("%Y-%m").encode())
+    return h.hexdigest()
+
+def source_files_hash():
+    files = {}
+    for root, dirs, fnames in os.walk(source_dir):
+        dirs.sort()
+        for fname in sorted(fnames):
+            if re_json.search(fname) or re_readme_md.search(fname):
+                filename = root+"/"+fname
+                with open(filename,"rb") as f:
+                    files[filename] = hashlib.sha1(f.read()).hexdigest()
+    return files
+
 ###################
 #
 ###################
@@ -1056,5 +1589,9 @@ def pub_links_load(filename):
                 }
             link_add(obj,link[1])
 
-main()
+if __name__ == "__main__":
+    main()
+    if args.profile is not None:
+        print ("writing",args.profile)
+        profile.write(args.profile)
 
@@ -43,12 +43,14 @@ __email__ = "dwolfson@zeus.caida.org, bhuffaker@ucsd.edu"
 ################################## Imports #####################################
 
 import argparse
+import collections
 import difflib
 import json
 import sys
 import re
-import os
 import lib.utils as utils
+import lib.parse_cache as parse_cache
+import lib.person_index as person_index
 
 #################################### Header ####################################
 
@@ -65,6 +67,7 @@ import lib.utils as utils
 # Datasets
 seen_ids = set()        # Will hold all the current IDs
 author_data = {}        # Will map all authors IDs to their JSON.
+person_seen = None      # Will index the current persons by name.
 papers = {}             # Will hold each paper.     
 
 # Definitions
@@ -194,6 +197,34 @@ re_yml = re.compile(r".yaml")
 re_jsn = re.compile(r".json")
 re_pubdb = re.compile(r"___pubdb")
 re_ext = re.compile(r"___externallinks")
+# A line holding any TOPKEY (anywhere in it) starts a new field, other
+# lines continue the previous one.
+re_topkey = re.compile("|".join(sorted(topkeys)))
+# The field parse_paper reads for the text before a line's first colon,
+# in the order it checks them (TITLE isn't CTITLE).
+topkey_fields = [
+    ["MARKER", ["MARKER"]],
+    ["TYPE", ["TYPE"]],
+    ["AUTHOR", ["AUTHOR"]],
+    ["TITLE", ["TITLE"]],
+    ["YEAR", ["YEAR"]],
+    ["TOPKEY", ["TOPKEY"]],
+    ["SERIAL", ["SERIAL"]],
+    ["VOLUME", ["VOLUME"]],
+    ["CHAPTER", ["CHAPTER", "ARTICLE"]],
+    ["PAGE", ["PAGE"]],
+    ["CTITLE", ["CTITLE"]],
+    ["DOI", ["DOI"]],
+    ["URL", ["URL"]],
+    ["ABS", ["ABS"]],
+    ["PUBLISH", ["PUBLISH"]],
+    ["REMARK", ["REMARK", "PLACE"]]
+]
+key_field = {}
+# TOPKEY -> [dataset or None, how it was matched, count], see topkey_resolve
+topkey_resolved = {}
+# [key, character counts] of topkey_2_dataset's keys, see topkey_close_match
+topkey_chars = None
 
 # File Paths
 data_papers = None
@@ -209,105 +240,244 @@ def main(argv):
     global topkey_2_dataset
     global alternate_links
     global data_papers
+    global person_seen
 
     parser = argparse.ArgumentParser()
     parser.add_argument("-d", type=str, default=None, dest="data_papers", help="Path to data-papers.yaml")
+    parser.add_argument("-r", action="store_true", dest="report", help="print the TOPKEYs matched fuzzily or not at all")
     args = parser.parse_args()
 
     # Edge Case: Exit if no data_papers is given.
     if args.data_papers is None:
         sys.exit()
 
-    data_papers = args.data_papers
+    outputs = placeholders_create(args.data_papers, parse_cache.snapshot_load())
+    for filename, data in outputs.items():
+        utils.file_write_changed(filename, data)
+
+    if args.report:
+        print_topkey_report()
+
+# Returns {filename: JSON} of the placeholders for the papers of
+# data_papers_file and their new authors.  snapshot is a
+# parse_cache.snapshot_load of sources, persons_added [filename, person]
+# of persons written since (by pubdb_placeholder.py).  persons is a
+# PersonIndex of the snapshot's persons, which gets persons_added, made
+# from the snapshot if None.
+def placeholders_create(data_papers_file, snapshot, persons_added=[], persons=None):
+    global data_papers
+    global person_seen
+
+    data_papers = data_papers_file
 
     # Add the current set of paper and persons
-    add_seen_ids(["sources/paper"])
-    add_seen_authors("sources/person")
+    add_seen_ids(["sources/paper"], snapshot)
+    person_seen = persons
+    if person_seen is None:
+        person_seen = person_index.PersonIndex()
+        person_seen.load_snapshot("sources/person", snapshot.get("sources/person", []), lambda fname: re_pubdb.search(fname) or re_ext.search(fname))
+    for filename, person in persons_added:
+        person_seen.add(filename, person)
 
     # Parse data_papers and create a new file for each paper.
     parse_data_papers()
 
+    outputs = {}
     # Print all the papers found to their respective JSON files.
-    print_papers()
+    print_papers(outputs)
 
     # Print all the papers found to their respective JSON files.
-    print_authors()
+    print_authors(outputs)
+    return outputs
 
 ############################### Helper Methods #################################
 
 # Add each paper's ID to seen_papers from the source/paper directory.
-def add_seen_ids(dirs):
+def add_seen_ids(dirs, snapshot):
     global seen_ids
 
     for d in dirs:
-        for fname in os.listdir(d):
+        for entry in snapshot.get(d, []):
+            fname = entry[0]
             # Edge Case: Skip if file is not .json.
             if re_jsn.search(fname) and not re_pubdb.search(fname) and not re_ext.search(fname):
-                with open(d+"/"+fname, "r") as opened_file:
-                    data = json.load(opened_file)
-                
+                data = parse_cache.snapshot_json(entry)
                 seen_ids.add(data["id"])
 
-# Add each paper's ID to seen_papers from the source/paper directory.
-def add_seen_authors(d):
-    for fname in os.listdir(d):
-        # Edge Case: Skip if file is not .json.
-        if re_jsn.search(fname) and not re_pubdb.search(fname) and not re_ext.search(fname):
-            f = d+'/'+fname
-            with open(f, "r") as opened_file:
-                person = json.load(opened_file)
-                person['already_found'] = True
-                utils.person_seen_add(f,person)
-
 # Opens a give .yaml file and parses each paper listed between delimeters.
 def parse_data_papers():
     global re_yml
     global data_papers
-    global topkeys
 
     # Parse data_papers file.
     if re_yml.search(data_papers):
-        with open(data_papers, "r") as file:
-            # Will store all the data for the current paper.
-            curr_paper = ""
-            curr_line = file.readline()
-            while curr_line:
-                # Edge Case: Skip commented lines.
-                if curr_line[0] == "#":
-                    curr_line = file.readline()
-                    continue
-
-                # Base Case: Parse current paper once delimeter is found.
-                if "---" in curr_line:
-                    if len(curr_paper) != 0:
-                        parse_paper(data_papers, curr_paper)
-                    curr_paper = ""
-                    curr_line = file.readline()
-                    continue
-                
-                # Check if the current line has one of the TOPKEY values.
-                topkey_in_line = False
-                for topkey in topkeys:
-                    if topkey in curr_line:
-                        topkey_in_line = True
-                
-                # Strip newline characters from lines without TOPKEY values.
-                if not topkey_in_line:
-                    curr_paper = curr_paper.rstrip()
-                    curr_paper += curr_line.strip()
-                else:
-                    curr_paper += curr_line.lstrip()
-                curr_line = file.readline()
+        for fields in data_papers_records(data_papers):
+            parse_paper(data_papers, fields)
 
     # Edge Case: Exit if a given file couldn't be open.
     else:
         print("File must be a .yaml file to be opened.", file=sys.stderr)
         sys.exit()
 
+# Yields each paper between "---" lines as a list of [field, value], field
+# is None for keys parse_paper doesn't read.  A paper not followed by a
+# "---" line is dropped.
+#
+# A field's continuation lines are joined to it without a space, after
+# stripping the whitespace around them and at the end of the text so far.
+# The text of a paper is kept as its finished lines plus the parts of the
+# current one, so a long field isn't copied for every line.
+def data_papers_records(filename):
+    lines = []
+    parts = []
+    with open(filename, "r") as file:
+        for line in file:
+            # Edge Case: Skip commented lines.
+            if line[0] == "#":
+                continue
+
+            # Base Case: Parse current paper once delimeter is found.
+            if "---" in line:
+                if len(lines) > 0 or any(len(part) > 0 for part in parts):
+                    yield record_fields(lines + ["".join(parts)])
+                lines = []
+                parts = []
+
+            elif re_topkey.search(line):
+                line = line.lstrip()
+                if line[-1:] == "\n":
+                    parts.append(line[:-1])
+                    lines.append("".join(parts))
+                    parts = []
+                else:
+                    parts.append(line)
+
+            else:
+                parts_rstrip(lines, parts)
+                line = line.strip()
+                if len(line) > 0:
+                    parts.append(line)
+
+# Strips the whitespace at the end of the paper's text, which takes the
+# newline (and more) off the last finished line when there are no parts.
+def parts_rstrip(lines, parts):
+    while True:
+        if len(parts) == 0:
+            if len(lines) == 0:
+                return
+            parts.append(lines.pop())
+        parts[-1] = parts[-1].rstrip()
+        if len(parts[-1]) > 0:
+            return
+        parts.pop()
+
+def record_fields(lines):
+    fields = []
+    for line in lines:
+        # Split the current line between the TOPKEY, and its value.
+        key, colon, value = line.partition(":")
+
+        # Edge Case: Skip empty lines.
+        if len(colon) == 0:
+            continue
+
+        # Remove any whitespace, and the quotes around the data.
+        value = value.replace('"',"").strip()
+        if key not in key_field:
+            key_field[key] = topkey_field(key)
+        fields.append([key_field[key], value])
+    return fields
+
+def topkey_field(key):
+    for field, names in topkey_fields:
+        for name in names:
+            if name in key and (name != "TITLE" or "CTITLE" not in key):
+                return field
+    return None
+
+
+# Maps a raw TOPKEY to its topkey_2_dataset value, None if it has none.
+# Each distinct TOPKEY is only resolved once.
+def topkey_resolve(dataset):
+    # Remove any whitespace.
+    dataset = dataset.strip().lower()
+    if dataset not in topkey_resolved:
+        topkey_resolved[dataset] = list(topkey_match(dataset)) + [0]
+    resolved = topkey_resolved[dataset]
+    resolved[2] += 1
+    return resolved[0]
+
+# returns [dataset or None, how]
+def topkey_match(dataset):
+    if dataset in topkey_2_dataset:
+        return topkey_2_dataset[dataset], "exact"
+    elif len(dataset) == 0:
+        return None, "empty"
+    elif dataset.replace(" ", "-") in topkey_2_dataset:
+        return topkey_2_dataset[dataset.replace(" ", "-")], "exact"
+    elif dataset.replace("_", "-") in topkey_2_dataset:
+        return topkey_2_dataset[dataset.replace("_", "-")], "exact"
+
+    closest_match = topkey_close_match(dataset)
+    if closest_match is not None:
+        return topkey_2_dataset[closest_match], "fuzzy "+closest_match
+
+    # Edge Case: Reverse the dataset if no match, then give up.
+    dataset = dataset.replace(" ", "-").replace("_", "-")
+    dataset = dataset.split("-")
+    dataset.reverse()
+    dataset = "-".join(map(str, dataset))
+    if dataset in topkey_2_dataset:
+        return topkey_2_dataset[dataset], "reversed "+dataset
+    return None, "unresolved"
+
+# The key difflib.get_close_matches(dataset, topkey_2_dataset.keys(), 1)
+# returns, or None.  It is the key with the highest (ratio, key) of those
+# with a ratio of at least cutoff.  The ratio of a key is at most its
+# quick_ratio, 2*(characters in common)/(total length), which the keys'
+# character counts give without running SequenceMatcher.  The keys are
+# tried from the highest bound down until the bound is below the best
+# ratio found.  Keys too short or too long to reach the cutoff are
+# skipped before counting.
+def topkey_close_match(dataset, cutoff=0.6):
+    global topkey_chars
+    if topkey_chars is None:
+        topkey_chars = [[key, collections.Counter(key)] for key in topkey_2_dataset]
+
+    chars = collections.Counter(dataset)
+    bounds = []
+    for key, key_chars in topkey_chars:
+        length = len(key) + len(dataset)
+        if 2.0*min(len(key), len(dataset))/length < cutoff:
+            continue
+        common = sum((chars & key_chars).values())
+        bound = 2.0*common/length
+        if bound >= cutoff:
+            bounds.append([bound, key])
+    bounds.sort(reverse=True)
+
+    best = None
+    matcher = difflib.SequenceMatcher()
+    matcher.set_seq2(dataset)
+    for bound, key in bounds:
+        if best is not None and bound < best[0]:
+            break
+        matcher.set_seq1(key)
+        ratio = matcher.ratio()
+        if ratio >= cutoff and (best is None or [ratio, key] > best):
+            best = [ratio, key]
+    return best[1] if best is not None else None
+
+def print_topkey_report():
+    for how_prefix, title in [["fuzzy", "fuzzy matched"], ["reversed", "matched reversed"], ["unresolved", "unresolved"]]:
+        resolved = [[dataset] + values for dataset, values in topkey_resolved.items() if values[1].startswith(how_prefix)]
+        print (title, "TOPKEYs", len(resolved))
+        for dataset, match, how, count in sorted(resolved, key=lambda r: (-r[3], r[0])):
+            print ("    %5d %-40s %s" % (count, dataset, how[len(how_prefix):].strip()))
 
 # Pull out all necessary meta data from the given paper and print a JSON file.
-#   @input curr_paper: A string where each \n is another TOPKEY.
-def parse_paper(fname, curr_paper):
+#   @input fields: The paper's [TOPKEY, value] pairs.
+def parse_paper(fname, fields):
     global author_data
     global type_2_bibtex
     global papers
@@ -323,37 +493,23 @@ def parse_paper(fname, curr_paper):
         "resources":[],
     }
 
-    # Split the current paper into each line.
-    curr_paper = curr_paper.split("\n")
-    
     re_year = re.compile("(\d\d\d\d)")
     re_year_month = re.compile("(\d\d\d\d).(\d\d)")
     # Iterate over each line of the current paper.
     found = False
-    for line in curr_paper:
-        # Split the current line between the TOPKEY, and its value.
-        line = line.split(":")
-
-        # Edge Case: Skip empty lines.
-        if len(line) <= 1:
-            continue
-        
-        # Remove any whitespace, and the quotes around the data.
-        line[1] = ":".join(map(str, line[1:]))
-        line[1] = line[1].replace('"',"").strip()
-
+    for key, value in fields:
         # Check which TOPKEY is used for the current line
-        if "MARKER" in line[0]:
-            paper["id"] = utils.id_create(fname, "paper", line[1])
+        if key == "MARKER":
+            paper["id"] = utils.id_create(fname, "paper", value)
                     
-        elif "TYPE" in line[0]:
-            paper_type = line[1]
+        elif key == "TYPE":
+            paper_type = value
             paper["bibtexFields"]["type"] = paper_type
 
-        elif "AUTHOR" in line[0]:
+        elif key == "AUTHOR":
             # Handle the two seperate ways that authors can be stored.
             authors = []
-            for author in re.split(";\s*", re.sub("\.\s*,",";",line[1])):
+            for author in re.split(";\s*", re.sub("\.\s*,",";",value)):
                 names = re.split("\s*,\s*", author)
                 if len(names) == 4:
                     authors.append(names[0]+", "+names[1])
@@ -368,7 +524,7 @@ def parse_paper(fname, curr_paper):
                 if re.search("\s*,\s*",author):
                     last_name, first_name = re.split("\s*,\s*",author)
                 elif not re.search("^[a-z]+$", author, re.IGNORECASE):
-                    print ("unparseable", line[1])
+                    print ("unparseable", value)
                     print ("    ",[last_name, first_name])
                     first_name = ""
                     last_name = author
@@ -382,12 +538,12 @@ def parse_paper(fname, curr_paper):
         # It is not the organization
         # elif "GEOLOC" in line[0]:
 
-        elif "TITLE" in line[0] and "CTITLE" not in line[0]:
-            title = line[1]
+        elif key == "TITLE":
+            title = value
             paper["name"] = title
 
-        elif "YEAR" in line[0]:
-            date_str = line[1]
+        elif key == "YEAR":
+            date_str = value
             m = re_year_month.search(date_str)
             date = None
             year = None
@@ -408,39 +564,15 @@ def parse_paper(fname, curr_paper):
                 if month:
                     paper["bibtexFields"]["month"] = month
         
-        elif "TOPKEY" in line[0]:
-            datasets = line[1].split(",")
+        elif key == "TOPKEY":
+            datasets = value.split(",")
 
             # Iterate over each dataset and link them to catalog datasets.
             for dataset in datasets:
-                # Remove any whitespace.
-                dataset = dataset.strip().lower()
-
                 # Try to map the current dataset to a catalog dataset.
-                if dataset in topkey_2_dataset:
-                    dataset = topkey_2_dataset[dataset]
-                elif len(dataset) == 0:
+                dataset = topkey_resolve(dataset)
+                if dataset is None:
                     continue
-                elif dataset.replace(" ", "-") in topkey_2_dataset:
-                    dataset = topkey_2_dataset[dataset.replace(" ", "-")]
-                elif dataset.replace("_", "-") in topkey_2_dataset:
-                    dataset = topkey_2_dataset[dataset.replace("_", "-")]
-                else:
-                    keys = topkey_2_dataset.keys()
-                    closest_match = difflib.get_close_matches(dataset, keys, 1)
-                   
-                    # Edge Case: Reverse the dataset if no match, then give up.
-                    if len(closest_match) == 0:
-                        dataset = dataset.replace(" ", "-").replace("_", "-")
-                        dataset = dataset.split("-")
-                        dataset.reverse()
-                        dataset = "-".join(map(str, dataset))
-                        if dataset in topkey_2_dataset:
-                            dataset = topkey_2_dataset[dataset]
-                        else:
-                            continue
-                    else:
-                        dataset = topkey_2_dataset[closest_match[0]]
 
 
                 # Append link to the dataset.
@@ -465,54 +597,54 @@ def parse_paper(fname, curr_paper):
                             "to":"dataset:{}".format(dataset)
                         })
 
-        elif "SERIAL" in line[0]:
-            publisher = line[1]
+        elif key == "SERIAL":
+            publisher = value
             paper["publisher"] = publisher
             paper["bibtexFields"]["journal"] = publisher
 
-        elif "VOLUME" in line[0]:
-            volume = line[1]
+        elif key == "VOLUME":
+            volume = value
             paper["bibtexFields"]["volume"] = volume
         
-        elif "CHAPTER" in line[0] or "ARTICLE" in line[0]:
-            number = line[1]
+        elif key == "CHAPTER":
+            number = value
             paper["number"] = number
 
-        elif "PAGE" in line[0]:
-            pages = line[1].replace("(", "").replace(")", "")
+        elif key == "PAGE":
+            pages = value.replace("(", "").replace(")", "")
             paper["pages"] = pages
             paper["bibtexFields"]["pages"] = pages
 
-        elif "CTITLE" in line[0]:
-            conference_title = line[1] 
+        elif key == "CTITLE":
+            conference_title = value 
             paper["publisher"] = conference_title
             paper["bibtexFields"]["bookTitle"] = conference_title
 
-        elif "DOI" in line[0]:
-            doi = line[1]
+        elif key == "DOI":
+            doi = value
             paper["resources"].append({
                 "name":"DOI",
                 "url":"https://dx.doi.org/"+doi
             })
 
-        elif "URL" in line[0]:
-            url = line[1]
+        elif key == "URL":
+            url = value
             paper["resources"].append({
                 "name":"URL",
                 "url":url
             })
 
-        elif "ABS" in line[0]:
-            paper["description"] = line[1]
+        elif key == "ABS":
+            paper["description"] = value
 
-        elif "PUBLISH" in line[0]:
-            paper["bibtexFields"]["institutions"] = line[1]
+        elif key == "PUBLISH":
+            paper["bibtexFields"]["institutions"] = value
         
-        elif "REMARK" in line[0] or "PLACE" in line[0]:
+        elif key == "REMARK":
             if "annotation" not in paper or len(paper["annotation"]) != 0:
-                paper["annotation"] = line[1]
+                paper["annotation"] = value
             else:
-                paper["annotation"] += " {}".format(line[1])
+                paper["annotation"] += " {}".format(value)
 
     # Only add papers that have ID.
     if "id" in paper:
@@ -523,7 +655,7 @@ def parse_paper(fname, curr_paper):
 #   @input author_id: The formatted ID for the current author.
 def add_author(fname, last_name, first_name):
     global author_data
-    person = utils.person_seen_check(last_name, first_name)
+    person = person_seen.check(last_name, first_name)
 
     if person is None:
         type_,author_id = utils.id_create(fname, "person", last_name+"__"+first_name).split(":")
@@ -546,7 +678,7 @@ def add_author(fname, last_name, first_name):
 
 
 # Print each paper to their respective JSON files.
-def print_papers():
+def print_papers(outputs):
     global author_data
     global papers
 
@@ -558,12 +690,11 @@ def print_papers():
         if paper_id not in seen_ids:
             id_ = paper_id.split(":")[1]
             file_path = "sources/paper/{}___externallinks.json".format(id_)
-            with open(file_path, "w") as paper_file:
-                print(json.dumps(paper, indent=4), file=paper_file)
+            outputs[file_path] = json.dumps(paper, indent=4)+"\n"
 
 
 # Print each author to their respective JSON files.
-def print_authors():
+def print_authors(outputs):
     global author_data
 
     # Iterate over each author and print their JSON.
@@ -575,10 +706,10 @@ def print_authors():
                 file_path = "sources/person/{}___externallinks.json".format(author_id).split(":")
 
             # Create a new file, or update the current file for each paper.
-            with open(file_path, "w") as author_file:
-               print(json.dumps(author, indent=4), file=author_file)
+            outputs[file_path] = json.dumps(author, indent=4)+"\n"
         else:
             print ("skipping", author)
 
 # Run the script given the inputs from the terminal.
-main(sys.argv[1:])
+if __name__ == "__main__":
+    main(sys.argv[1:])
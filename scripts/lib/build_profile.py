@@ -0,0 +1,91 @@
+import json
+import os
+import resource
+import time
+import tracemalloc
+
+# Timings for a build, written as JSON so two reports can be diffed.
+#
+#   phases   per phase in the order they ran: wall and cpu seconds and the
+#            tracemalloc peak (bytes allocated by python) while it ran
+#
+# cpu counts this process and the child processes it waited for during the
+# phase, such as the parse pool's workers and git log, cpu_children is
+# the children's part of it.  The memory peak is this process's alone.
+#   files    the files that cost the most, summed over every phase that
+#            recorded time for them
+#   counts   calls of the counted functions
+#
+# A disabled profile only keeps the counts, so the calls can stay in the
+# build.  tracemalloc slows python down noticeably, the wall and cpu times
+# of a profiled build are only comparable to other profiled builds.
+
+class Profile:
+    def __init__(self, enabled=False, files_top=20):
+        self.enabled = enabled
+        self.files_top = files_top
+        self.phases = []
+        self.phase_current = None
+        self.file_seconds = {}
+        self.counts = {}
+        self.start = time.perf_counter()
+        if enabled:
+            tracemalloc.start()
+
+    # ends the current phase and starts the next, None just ends it
+    def phase(self, name):
+        if not self.enabled:
+            return
+        now = [time.perf_counter(), time.process_time(), cpu_children()]
+        if self.phase_current is not None:
+            phase_name, wall, cpu, cpu_child = self.phase_current
+            self.phases.append({
+                "name":phase_name,
+                "wall":round(now[0] - wall, 4),
+                "cpu":round(now[1] - cpu + now[2] - cpu_child, 4),
+                "cpu_children":round(now[2] - cpu_child, 4),
+                "memory_peak":tracemalloc.get_traced_memory()[1]
+            })
+        self.phase_current = None
+        if name is not None:
+            tracemalloc.reset_peak()
+            self.phase_current = [name] + now
+
+    def file_add(self, filename, seconds):
+        if not self.enabled:
+            return
+        if filename in self.file_seconds:
+            self.file_seconds[filename] += seconds
+        else:
+            self.file_seconds[filename] = seconds
+
+    def count(self, name, number=1):
+        if name in self.counts:
+            self.counts[name] += number
+        else:
+            self.counts[name] = number
+
+    def report(self):
+        files = sorted(self.file_seconds.items(), key=lambda file_seconds: (-file_seconds[1], file_seconds[0]))
+        return {
+            "wall":round(time.perf_counter() - self.start, 4),
+            "cpu":round(time.process_time() + cpu_children(), 4),
+            "cpu_children":round(cpu_children(), 4),
+            "memory_peak":max([phase["memory_peak"] for phase in self.phases] + [0]),
+            # kilobytes on linux, bytes on macOS
+            "maxrss":resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "cpus":os.cpu_count(),
+            "phases":self.phases,
+            "files":[{"filename":filename, "seconds":round(seconds, 6)} for filename, seconds in files[:self.files_top]],
+            "counts":self.counts
+        }
+
+    def write(self, filename):
+        self.phase(None)
+        with open(filename, "w") as f:
+            json.dump(self.report(), f, indent=4)
+
+# user and system seconds of the terminated child processes waited for
+def cpu_children():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
@@ -0,0 +1,69 @@
+import subprocess
+
+# The dates of every file under a directory from one walk of its history,
+# 'git log -z --name-status', instead of two 'git log' commands per file:
+#
+#   {path: [created, last updated]}
+#
+# in git's %aD format.  last updated matches 'git log -1' and created
+# 'git log --diff-filter=A --follow -1', by carrying renames back to the
+# commit that added the file.  --follow also takes a file added where
+# another one was (renamed away or deleted before) for a copy of its older
+# self when their content is close enough, which the walk can't tell, so
+# the created date of those few paths comes from that command itself.
+# Renames are asked for with -M, whatever diff.renames is set to.
+# Raises what subprocess raises if git fails.
+
+def dates_load(source_dir):
+    result = subprocess.check_output(["git", "log", "-z", "--name-status", "-M",
+        "--format=%x01%aD", "--", source_dir], stderr=subprocess.DEVNULL)
+
+    path_dates = {}
+    # follow maps an older name to the current path it was renamed to,
+    # added the name a path got its created date from to that path
+    follow = {}
+    added = {}
+    readded = set()
+    date = None
+    tokens = result.decode().split("\0")
+    i = 0
+    while i < len(tokens):
+        token = tokens[i].strip("\n")
+        i += 1
+        if len(token) == 0:
+            continue
+        if token[0] == "\x01":
+            date = token[1:]
+            continue
+        status = token[0]
+        if status in "RC":
+            before, after = tokens[i:i+2]
+            i += 2
+        else:
+            before = after = tokens[i]
+            i += 1
+
+        # a name still in use before the commit that added it
+        for name in [before, after]:
+            if name in added:
+                readded.add(added[name])
+
+        if after not in path_dates:
+            path_dates[after] = [None, date]
+
+        if status == "A":
+            path = follow.pop(after, after)
+            if path in path_dates and path_dates[path][0] is None:
+                path_dates[path][0] = date
+                added[after] = path
+        elif status == "R":
+            follow[before] = follow.pop(after, after)
+
+    for path in readded:
+        path_dates[path][0] = date_created(path)
+    return path_dates
+
+def date_created(path):
+    result = subprocess.check_output(["git", "log", "--diff-filter=A", "--follow",
+        "--format=%aD", "-1", "--", path], stderr=subprocess.DEVNULL)
+    return result.decode().strip() or None
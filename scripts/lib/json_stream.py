@@ -0,0 +1,75 @@
+import filecmp
+import gzip
+import json
+import os
+import shutil
+
+# zstandard is only needed for zstd sidecars
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Writes a JSON object one top level entry at a time, so the whole document
+# is never held as a single string.  The default layout is byte for byte
+# what json.dump(data, f, indent=4) writes, compact drops the indentation
+# and the spaces after the separators.
+#
+# Sidecars are compressed copies written next to the file, filename.gz and
+# filename.zst.
+
+sidecar_extension = {
+    "gzip":".gz",
+    "zstd":".zst"
+}
+
+def entries_write(f, entries, compact=False):
+    first = True
+    for key, value in entries:
+        if compact:
+            f.write("{" if first else ",")
+            f.write(json.dumps(key)+":"+json.dumps(value, separators=(",",":")))
+        else:
+            f.write("{\n    " if first else ",\n    ")
+            f.write(json.dumps(key)+": "+json.dumps(value, indent=4).replace("\n","\n    "))
+        first = False
+    if first:
+        f.write("{}")
+    elif compact:
+        f.write("}")
+    else:
+        f.write("\n}")
+
+# Returns False if changed_only is set and the file already held the same
+# bytes, in which case it is left untouched.
+def json_write(filename, entries, compact=False, sidecars=[], changed_only=False):
+    filename_tmp = filename+".tmp"
+    with open(filename_tmp,"w") as f:
+        entries_write(f, entries, compact)
+
+    written = True
+    if changed_only and os.path.exists(filename) and filecmp.cmp(filename_tmp, filename, shallow=False):
+        os.remove(filename_tmp)
+        written = False
+    else:
+        os.replace(filename_tmp, filename)
+
+    for sidecar in sidecars:
+        if written or not os.path.exists(filename+sidecar_extension[sidecar]):
+            sidecar_write(filename, sidecar)
+    return written
+
+def sidecar_write(filename, sidecar):
+    filename_sidecar = filename+sidecar_extension[sidecar]
+    with open(filename,"rb") as f_in, open(filename_sidecar+".tmp","wb") as f_out:
+        if sidecar == "gzip":
+            # mtime=0 keeps the sidecar the same for the same input
+            with gzip.GzipFile(os.path.basename(filename), "wb", fileobj=f_out, mtime=0) as f_zip:
+                shutil.copyfileobj(f_in, f_zip)
+        elif sidecar == "zstd":
+            if zstandard is None:
+                raise ValueError("zstd sidecars need the zstandard package")
+            zstandard.ZstdCompressor().copy_stream(f_in, f_out)
+        else:
+            raise ValueError("unknown sidecar '"+sidecar+"'")
+    os.replace(filename_sidecar+".tmp", filename_sidecar)
@@ -0,0 +1,225 @@
+import array
+import itertools
+import operator
+
+# numpy is only needed for a faster rank()
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# The links between objects, stored once per direction as integer node ids.
+#
+# Every link gets an entry under both of its ends, in the order the links
+# were added, holding nothing for a plain link and a tuple of (key, label)
+# pairs for one with labels.  Ids and labels are interned so a link costs
+# a dict slot rather than a dict of strings.  items() and to_dict() give
+# back the id_id_link.json shape:
+#
+#   {id0: {id1: {"from":id0, "to":id1, "label":...}}}
+#
+# neighbors() walks CSR arrays (per node an offset into one array of
+# neighbours) which are built on the first call after a change.
+
+link_keys = ["from_label", "to_label", "label"]
+link_key_index = {key:i for i, key in enumerate(link_keys)}
+
+class LinkStore:
+    def __init__(self):
+        self.ids = []
+        self.id_index = {}
+        self.labels = []
+        self.label_index = {}
+        # node -> {node: None or ((key, label), ...)}
+        self.adjacency = {}
+        self.csr = None
+
+    def node(self, id_):
+        if id_ in self.id_index:
+            return self.id_index[id_]
+        node = self.id_index[id_] = len(self.ids)
+        self.ids.append(id_)
+        return node
+
+    def label(self, value):
+        if type(value) != str:
+            self.labels.append(value)
+            return len(self.labels) - 1
+        if value not in self.label_index:
+            self.label_index[value] = len(self.labels)
+            self.labels.append(value)
+        return self.label_index[value]
+
+    # Adds the link a to b, a link that already exists only gains the
+    # labels it doesn't have yet.
+    def add(self, a_id, b_id, labels):
+        a = self.node(a_id)
+        b = self.node(b_id)
+        attributes = tuple((link_key_index[key], self.label(value)) for key, value in labels)
+        if a not in self.adjacency:
+            self.adjacency[a] = {}
+        links = self.adjacency[a]
+        if b not in links:
+            links[b] = attributes if len(attributes) > 0 else None
+        elif len(attributes) > 0:
+            current = links[b] or ()
+            keys = set(key for key, label in current)
+            added = tuple(key_label for key_label in attributes if key_label[0] not in keys)
+            if len(added) > 0:
+                links[b] = current + added
+        self.csr = None
+
+    def __contains__(self, id_):
+        return id_ in self.id_index and self.id_index[id_] in self.adjacency
+
+    # the ids that have links, in the order they got their first one
+    def sources(self):
+        for a in self.adjacency:
+            yield self.ids[a]
+
+    def csr_build(self):
+        nodes = array.array("I")
+        offsets = array.array("I", [0])
+        neighbors = array.array("I")
+        node_row = {}
+        for a, links in self.adjacency.items():
+            node_row[a] = len(nodes)
+            nodes.append(a)
+            neighbors.extend(links.keys())
+            offsets.append(len(neighbors))
+        self.csr = [node_row, offsets, neighbors]
+
+    def neighbors(self, id_):
+        if self.csr is None:
+            self.csr_build()
+        node_row, offsets, neighbors = self.csr
+        a = self.id_index.get(id_)
+        if a is None or a not in node_row:
+            return
+        row = node_row[a]
+        for i in range(offsets[row], offsets[row+1]):
+            yield self.ids[neighbors[i]]
+
+    # Drops the ids' own links and every link pointing at them.  The ids
+    # left without any links keep their (empty) entry.
+    def remove(self, ids):
+        nodes = set(self.id_index[id_] for id_ in ids if id_ in self)
+        for a in nodes:
+            for b in self.adjacency[a]:
+                if b not in nodes:
+                    del self.adjacency[b][a]
+        for a in nodes:
+            del self.adjacency[a]
+        self.csr = None
+
+    def link(self, a, b, attributes):
+        link = {
+            "from":self.ids[a],
+            "to":self.ids[b]
+        }
+        if attributes is not None:
+            for key, label in attributes:
+                link[link_keys[key]] = self.labels[label]
+        return link
+
+    def items(self):
+        for a, links in self.adjacency.items():
+            yield self.ids[a], {self.ids[b]:self.link(a, b, attributes) for b, attributes in links.items()}
+
+    def to_dict(self):
+        return dict(self.items())
+
+    # PageRank over the links between ids.  A node hands its rank to its
+    # neighbours in proportion to their node_weight, a node without links
+    # spreads its rank over every node.  Returns {id: rank}, summing to 1.
+    #
+    # The transition matrix is built once as CSR arrays by target, per id
+    # the indexes of the ids linking to it and the share of their rank it
+    # gets, and every iteration is a sparse product with it.
+    def rank(self, ids, node_weight, damping=.85, iterations=100, tolerance=1e-10):
+        transitions = self.transitions(ids, node_weight)
+        if len(ids) == 0:
+            return {}
+        if numpy is not None:
+            rank = rank_numpy(transitions, len(ids), damping, iterations, tolerance)
+        else:
+            rank = rank_python(transitions, len(ids), damping, iterations, tolerance)
+        return dict(zip(ids, rank))
+
+    # Returns sources, shares, offsets and dangling for rank(): the links
+    # into ids[j] are sources[offsets[j]:offsets[j+1]], ascending, with the
+    # share of the source's rank in shares, and dangling the indexes of
+    # the ids without links to pass their rank on to.
+    def transitions(self, ids, node_weight):
+        if self.csr is None:
+            self.csr_build()
+        node_row, offsets, neighbors = self.csr
+        index = {}
+        for i, id_ in enumerate(ids):
+            if id_ in self.id_index:
+                index[self.id_index[id_]] = i
+        weights = [node_weight(id_) for id_ in ids]
+
+        incoming = [[] for id_ in ids]
+        dangling = array.array("I")
+        for i, id_ in enumerate(ids):
+            a = self.id_index.get(id_)
+            targets = []
+            if a is not None and a in node_row:
+                row = node_row[a]
+                for k in range(offsets[row], offsets[row+1]):
+                    b = neighbors[k]
+                    if b in index and weights[index[b]] > 0:
+                        targets.append(index[b])
+            total = sum(weights[j] for j in targets)
+            if total <= 0:
+                dangling.append(i)
+                continue
+            for j in targets:
+                incoming[j].append([i, weights[j]/total])
+
+        sources = array.array("I")
+        shares = array.array("d")
+        target_offsets = [0]
+        for links in incoming:
+            for i, share in links:
+                sources.append(i)
+                shares.append(share)
+            target_offsets.append(len(sources))
+        return sources, shares, target_offsets, dangling
+
+def rank_numpy(transitions, n, damping, iterations, tolerance):
+    sources, shares, offsets, dangling = transitions
+    sources = numpy.frombuffer(sources, dtype=numpy.uint32).astype(numpy.intp)
+    shares = numpy.frombuffer(shares, dtype=numpy.float64)
+    targets = numpy.repeat(numpy.arange(n), numpy.diff(offsets))
+    dangling = numpy.frombuffer(dangling, dtype=numpy.uint32).astype(numpy.intp)
+    rank = numpy.full(n, 1/n)
+    for iteration in range(iterations):
+        base = (1 - damping + damping*rank[dangling].sum())/n
+        rank_next = numpy.bincount(targets, weights=damping*rank[sources]*shares, minlength=n) + base
+        delta = numpy.abs(rank_next - rank).sum()
+        rank = rank_next
+        if delta < tolerance:
+            break
+    return rank.tolist()
+
+# Without numpy an iteration is a few maps over the links and the ids
+# rather than a Python loop per link: the rank flowing along each link,
+# its running total, and per id the difference of that total at the ends
+# of its links.
+def rank_python(transitions, n, damping, iterations, tolerance):
+    sources, shares, offsets, dangling = transitions
+    starts = offsets[:-1]
+    ends = offsets[1:]
+    rank = [1/n]*n
+    for iteration in range(iterations):
+        damped = [damping*r for r in rank]
+        totals = list(itertools.accumulate(map(operator.mul, map(damped.__getitem__, sources), shares), initial=0.0))
+        base = (1 - damping + damping*sum(map(rank.__getitem__, dangling)))/n
+        rank_next = list(map(base.__add__, map(operator.sub, map(totals.__getitem__, ends), map(totals.__getitem__, starts))))
+        delta = sum(map(abs, map(operator.sub, rank_next, rank)))
+        rank = rank_next
+        if delta < tolerance:
+            break
+    return rank
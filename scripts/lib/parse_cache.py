@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import pickle
+
+# Parsed source files shared by data-build.py and the placeholder scripts,
+# so a make run parses each file once rather than once per script.
+#
+#   {(path, kind): [mtime_ns, size, sha1, pickled value, write last used]}
+#
+# kind names the parser (and whatever else its output depends on, like the
+# repository url of a recipe).  A file whose mtime and size match is not
+# read at all, one that only got touched is read and hashed but not parsed.
+# Every get() unpickles a fresh copy, the callers are free to change it.
+#
+# Files that fail to parse are never cached, so their errors come back on
+# every run.  The cache is written atomically and only if it changed, a
+# file it can't read is treated as empty.  The placeholder files are
+# deleted and written again by every make run, so the entries of missing
+# files are only dropped once unused for keep_writes writes.
+
+cache_file = "parse_cache.pickle"
+# bump when a parser's output changes
+cache_version = 1
+keep_writes = 10
+
+class ParseCache:
+    def __init__(self, filename=cache_file):
+        self.filename = filename
+        self.entries = {}
+        self.writes = 0
+        self.changed = False
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(filename, "rb") as f:
+                version, writes, entries = pickle.load(f)
+            if version == cache_version:
+                self.writes = writes
+                self.entries = entries
+        except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+            pass
+
+    # Returns found, value, content without parsing, content is the file's bytes
+    # when it had to be read.
+    def lookup(self, path, kind):
+        key = (path, kind)
+        stat = os.stat(path)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            if entry[4] != self.writes:
+                entry[4] = self.writes
+                self.changed = True
+            self.hits += 1
+            return True, pickle.loads(entry[3]), None
+
+        with open(path, "rb") as f:
+            content = f.read()
+        if entry is not None and entry[2] == hashlib.sha1(content).hexdigest():
+            entry[0] = stat.st_mtime_ns
+            entry[1] = stat.st_size
+            entry[4] = self.writes
+            self.changed = True
+            self.hits += 1
+            return True, pickle.loads(entry[3]), content
+        return False, None, content
+
+    def add(self, path, kind, value, content=None):
+        stat = os.stat(path)
+        if content is None:
+            with open(path, "rb") as f:
+                content = f.read()
+        self.entries[(path, kind)] = [stat.st_mtime_ns, stat.st_size, hashlib.sha1(content).hexdigest(), pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self.writes]
+        self.changed = True
+        self.misses += 1
+
+    # parse(content bytes) -> value
+    def get(self, path, kind, parse):
+        found, value, content = self.lookup(path, kind)
+        if found:
+            return value
+        value = parse(content)
+        self.add(path, kind, value, content)
+        return value
+
+    def json_load(self, path):
+        return self.get(path, "json", json.loads)
+
+    def write(self):
+        for key, entry in list(self.entries.items()):
+            if entry[4] < self.writes - keep_writes and not os.path.exists(key[0]):
+                del self.entries[key]
+                self.changed = True
+        if not self.changed:
+            return
+        self.writes += 1
+        with open(self.filename+".tmp", "wb") as f:
+            pickle.dump([cache_version, self.writes, self.entries], f, pickle.HIGHEST_PROTOCOL)
+        os.replace(self.filename+".tmp", self.filename)
+        self.changed = False
+
+# The JSON files of every directory in source_dir, in os.listdir order,
+# read once for the scripts that scan the whole tree:
+#
+#   {directory: [[fname, obj, error], ...]}
+#
+# error is what parsing the file raised (and obj None), snapshot_json
+# raises it again for the scripts that would have.  The files skip(fname)
+# accepts are left out.
+def snapshot_load(source_dir="sources", cache=None, skip=None):
+    if cache is None:
+        cache = ParseCache()
+    snapshot = {}
+    for type_ in os.listdir(source_dir):
+        directory = source_dir+"/"+type_
+        if not os.path.isdir(directory):
+            continue
+        entries = snapshot[directory] = []
+        for fname in os.listdir(directory):
+            path = directory+"/"+fname
+            if "json" not in fname.lower() or (skip is not None and skip(fname)) or not os.path.isfile(path):
+                continue
+            try:
+                entries.append([fname, cache.json_load(path), None])
+            except ValueError as e:
+                entries.append([fname, None, e])
+    cache.write()
+    return snapshot
+
+def snapshot_json(entry):
+    fname, obj, error = entry
+    if error is not None:
+        raise error
+    return obj
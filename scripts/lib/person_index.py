@@ -0,0 +1,67 @@
+import re
+import unidecode
+import lib.parse_cache as parse_cache
+
+# The persons of sources/person keyed by name, shared by the placeholder
+# scripts.  A name is looked up
+#
+#   exactly         "nameLast;nameFirst" lowercased
+#   unidecoded      ascii, with runs of anything but letters and digits
+#                   turned into one space, only if a single person has it
+#
+# A person's alternate "names" are indexed like its own name.  The persons
+# come from a parse_cache snapshot, which the placeholder scripts share.
+
+re_not_word = re.compile("[^a-z0-9]+")
+
+def key_exact(nameLast, nameFirst):
+    return nameLast.lower()+";"+nameFirst.lower()
+
+def name_words(name):
+    return re_not_word.sub(" ", unidecode.unidecode(name).lower()).strip()
+
+def key_unidecoded(nameLast, nameFirst):
+    return name_words(nameLast)+";"+name_words(nameFirst)
+
+class PersonIndex:
+    def __init__(self):
+        self.exact = {}
+        self.exact_fname = {}
+        self.unidecoded = {}
+
+    # Adds the persons of a directory's parse_cache snapshot entries that
+    # skip(fname) doesn't reject, the first person with a name keeps it.
+    def load_snapshot(self, directory, entries, skip=None):
+        for entry in entries:
+            if not entry[0].endswith(".json") or (skip is not None and skip(entry[0])):
+                continue
+            self.add(directory+"/"+entry[0], parse_cache.snapshot_json(entry))
+
+    def add(self, fname, person):
+        names = [person]
+        if "names" in person:
+            for name in person["names"]:
+                names.append(name)
+        for name in names:
+            n = key_exact(name["nameLast"], name["nameFirst"])
+            if n not in self.exact:
+                self.exact[n] = person
+                self.exact_fname[n] = fname
+            else:
+                print ("duplicate",person["id"])
+                print ("    ",self.exact_fname[n])
+                print ("    ",fname)
+            self.unidecoded_add(key_unidecoded(name["nameLast"], name["nameFirst"]), person)
+
+    # a key of more than one person maps to None
+    def unidecoded_add(self, key, person):
+        if key not in self.unidecoded:
+            self.unidecoded[key] = person
+        elif self.unidecoded[key] is not None and self.unidecoded[key]["id"] != person["id"]:
+            self.unidecoded[key] = None
+
+    def check(self, nameLast, nameFirst):
+        n = key_exact(nameLast, nameFirst)
+        if n in self.exact:
+            return self.exact[n]
+        return self.unidecoded.get(key_unidecoded(nameLast, nameFirst))
@@ -0,0 +1,128 @@
+# Catalog objects as records rather than dicts.
+#
+# The keys every object (or every person) has are kept in __slots__, the
+# values of the rest in a list.  The key order, which the JSON output
+# keeps, is a tuple shared by every record with the same keys in the same
+# order (a build has about 150), along with the position of each of the
+# other keys' values in the list.
+#
+# A Record behaves like the dict it was made from for the dict methods the
+# build uses, to_dict() gives back that dict.
+
+record_keys = [
+    "id",
+    "__typename",
+    "name",
+    "filename",
+    "date",
+    "dateCreated",
+    "dateLastUpdated",
+    "tags",
+    "description",
+    "nameFirst",
+    "nameLast"
+]
+# the slot of each record key, __ names would be mangled inside the class
+key_slot = {key:"v_"+key.strip("_") for key in record_keys}
+
+class Missing:
+    pass
+missing = Missing()
+
+# order -> [order, {key: position in extra}]
+orders = {}
+
+def order_intern(order):
+    if order not in orders:
+        extra_index = {}
+        for key in order:
+            if key not in key_slot:
+                extra_index[key] = len(extra_index)
+        orders[order] = [order, extra_index]
+    return orders[order]
+
+class Record:
+    __slots__ = list(key_slot.values()) + ["order", "extra_index", "extra"]
+
+    def __init__(self, data=None):
+        for slot in key_slot.values():
+            setattr(self, slot, missing)
+        self.order, self.extra_index = order_intern(())
+        self.extra = None
+        if data is not None:
+            for key, value in data.items():
+                self[key] = value
+
+    def __getitem__(self, key):
+        if key in key_slot:
+            value = getattr(self, key_slot[key])
+            if value is missing:
+                raise KeyError(key)
+            return value
+        return self.extra[self.extra_index[key]]
+
+    def __setitem__(self, key, value):
+        if key in key_slot:
+            if getattr(self, key_slot[key]) is missing:
+                self.order, self.extra_index = order_intern(self.order + (key,))
+            setattr(self, key_slot[key], value)
+        elif key in self.extra_index:
+            self.extra[self.extra_index[key]] = value
+        else:
+            self.order, self.extra_index = order_intern(self.order + (key,))
+            if self.extra is None:
+                self.extra = []
+            self.extra.append(value)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        if key in key_slot:
+            setattr(self, key_slot[key], missing)
+        else:
+            del self.extra[self.extra_index[key]]
+            if len(self.extra) == 0:
+                self.extra = None
+        self.order, self.extra_index = order_intern(tuple(k for k in self.order if k != key))
+
+    def __contains__(self, key):
+        if key in key_slot:
+            return getattr(self, key_slot[key]) is not missing
+        return key in self.extra_index
+
+    def __iter__(self):
+        return iter(self.order)
+
+    def __len__(self):
+        return len(self.order)
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def keys(self):
+        return self.order
+
+    def values(self):
+        return [self[key] for key in self.order]
+
+    def items(self):
+        return [(key, self[key]) for key in self.order]
+
+    def to_dict(self):
+        return dict(self.items())
+
+# for json.dumps(..., default=json_default)
+def json_default(value):
+    if type(value) == Record:
+        return value.to_dict()
+    raise TypeError("Object of type "+type(value).__name__+" is not JSON serializable")
+
+def object_dict(obj):
+    if type(obj) == Record:
+        return obj.to_dict()
+    return obj
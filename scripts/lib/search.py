@@ -0,0 +1,209 @@
+import json
+import os
+import re
+import lib.search_index as search_index
+
+# Evaluates the catalog search language described in
+# sources/recipe/how_to_search_the_catalog over the files written by
+# data-build.py.
+#
+#   words, -words    objects with (without) every word in a text field
+#   ids, -ids        objects (not) directly linked to every id
+#   types=           objects of any of the types
+#   persons=         objects with a person whose name contains any value
+#   ids=             any of the ids
+#   dates=           objects dated in any of the years (2015) or months (2015.03)
+#   links=           neighbours of any of the ids, or of objects holding
+#                    any of the strings
+#
+# A key without values (types=) is left out.  Ids have no '/', so a URL
+# is searched for as words.
+#
+# With id_neighbor.bin links= of ids together with types= is a single
+# lookup in its neighbour by type lists.
+#
+# The positive terms are evaluated cheapest first, the smallest set is
+# materialized and then filtered by the others, and the matches are ranked
+# by the sum of their word scores plus their id_score.json link score.
+
+re_id = re.compile("^[a-z_]+:[^\s:=/]+$")
+re_not_word = re.compile("[^a-z^A-Z^0-9]+")
+
+word_id_score_file = "word_id_score.json"
+type_ids_file = "type_ids.json"
+personName_ids_file = "personName_ids.json"
+id_id_link_file = "id_id_link.json"
+id_object_file = "id_object.json"
+id_score_file = "id_score.json"
+id_neighbor_index_file = "id_neighbor.bin"
+
+def query_parse(query):
+    parsed = {
+        "words":[],
+        "words_not":[],
+        "ids":[],
+        "ids_not":[],
+        "keys":{}
+    }
+    for token in query.lower().split():
+        if "=" in token:
+            key, values = token.split("=", 1)
+            values = [value for value in values.split(",") if len(value) > 0]
+            if len(values) == 0:
+                continue
+            if key not in parsed["keys"]:
+                parsed["keys"][key] = []
+            parsed["keys"][key].extend(values)
+            continue
+
+        negative = token[0] == "-" and len(token) > 1
+        if negative:
+            token = token[1:]
+        if re_id.search(token):
+            parsed["ids_not" if negative else "ids"].append(token)
+        else:
+            parsed["words_not" if negative else "words"].append(token)
+    return parsed
+
+class Catalog:
+    def __init__(self, directory="."):
+        self.directory = directory
+        self.word_id_score = self.load(word_id_score_file)
+        self.type_ids = {}
+        for type_, ids in self.load(type_ids_file).items():
+            self.type_ids[type_.lower()] = set(ids)
+        self.personName_ids = self.load(personName_ids_file)
+        self.id_id_link = self.load(id_id_link_file)
+        self.ids = set()
+        for ids in self.type_ids.values():
+            self.ids.update(ids)
+        self.id_date = None
+        # builds before id_score.json rank by the word scores alone
+        self.id_score = {}
+        if os.path.exists(os.path.join(directory, id_score_file)):
+            self.id_score = self.load(id_score_file)
+        self.neighbor_index = None
+        if os.path.exists(os.path.join(directory, id_neighbor_index_file)):
+            self.neighbor_index = search_index.NeighborIndex(os.path.join(directory, id_neighbor_index_file))
+
+    def load(self, filename):
+        with open(os.path.join(self.directory, filename)) as f:
+            return json.load(f)
+
+    # dates are only in id_object.json, which is loaded on the first dates= query
+    def date_ids(self, date):
+        if self.id_date is None:
+            self.id_date = {}
+            for id_, obj in self.load(id_object_file).items():
+                if "date" in obj and obj["date"] is not None:
+                    self.id_date[id_] = obj["date"]
+        date = date.replace(".", "-")
+        ids = set()
+        for id_, d in self.id_date.items():
+            if d == date or d[:len(date)+1] == date+"-":
+                ids.add(id_)
+        return ids
+
+    # postings of a word, a word the index doesn't have is split the way
+    # data-build.py splits text and each part has to match
+    def word_postings(self, word):
+        if word in self.word_id_score:
+            return self.word_id_score[word]
+        parts = [part for part in re_not_word.split(word) if len(part) > 0]
+        if len(parts) <= 1:
+            return self.word_id_score.get(parts[0] if parts else word, {})
+        id_score = None
+        for part in parts:
+            postings = self.word_id_score.get(part, {})
+            if id_score is None:
+                id_score = dict(postings)
+            else:
+                id_score = {id_:score+postings[id_] for id_, score in id_score.items() if id_ in postings}
+        return id_score
+
+    def neighbors(self, id_):
+        return self.id_id_link.get(id_, {})
+
+    # the ids linked to any of ids, of any of the types (None for all),
+    # hops=2 gives the ids two links away and needs a data-build.py -k index
+    def links_ids(self, ids, types=None, hops=1):
+        linked = set()
+        for id_ in ids:
+            if self.neighbor_index is not None:
+                if hops == 2 and not self.neighbor_index.has_hop2():
+                    raise ValueError(id_neighbor_index_file+" has no two link index, build with data-build.py -k")
+                linked.update(self.neighbor_index.neighbors(id_, types, hops))
+            elif hops == 1:
+                for neighbor in self.neighbors(id_):
+                    if types is None or neighbor.split(":")[0] in types:
+                        linked.add(neighbor)
+            else:
+                raise ValueError("two link queries need "+id_neighbor_index_file)
+        return linked
+
+    def key_ids(self, key, values):
+        ids = set()
+        for value in values:
+            if key == "types":
+                ids.update(self.type_ids.get(value, ()))
+            elif key == "persons":
+                for name, name_ids in self.personName_ids.items():
+                    if value in name:
+                        ids.update(name_ids)
+                for id_ in self.type_ids.get("person", ()):
+                    if value in id_[7:]:
+                        ids.add(id_)
+            elif key == "ids":
+                if value in self.ids:
+                    ids.add(value)
+            elif key == "dates":
+                ids.update(self.date_ids(value))
+            elif key == "links":
+                if re_id.search(value):
+                    ids.update(self.neighbors(value).keys())
+                else:
+                    for id_ in self.word_postings(value):
+                        ids.update(self.neighbors(id_).keys())
+            else:
+                raise ValueError("unknown key '"+key+"'")
+        return ids
+
+    def search(self, query):
+        parsed = query_parse(query)
+
+        # a set or dict of ids for every positive term
+        words_postings = []
+        for word in parsed["words"]:
+            words_postings.append(self.word_postings(word))
+        terms = list(words_postings)
+        for id_ in parsed["ids"]:
+            terms.append(self.neighbors(id_))
+        keys = dict(parsed["keys"])
+        if "links" in keys and "types" in keys and self.neighbor_index is not None:
+            if all(re_id.search(value) for value in keys["links"]):
+                terms.append(self.links_ids(keys.pop("links"), keys.pop("types")))
+        for key, values in keys.items():
+            terms.append(self.key_ids(key, values))
+        terms.sort(key=len)
+
+        if len(terms) > 0:
+            matches = set(terms[0])
+            for term in terms[1:]:
+                if len(matches) == 0:
+                    break
+                matches = {id_ for id_ in matches if id_ in term}
+        else:
+            matches = set(self.ids)
+
+        for word in parsed["words_not"]:
+            matches.difference_update(self.word_postings(word))
+        for id_ in parsed["ids_not"]:
+            matches.difference_update(self.neighbors(id_))
+
+        id_score = {}
+        for id_ in matches:
+            score = self.id_score.get(id_, 0)
+            for postings in words_postings:
+                score += postings[id_]
+            id_score[id_] = score
+        return sorted(id_score.items(), key=lambda id_score: (-id_score[1], id_score[0]))
@@ -0,0 +1,391 @@
+import array
+import heapq
+import mmap
+import struct
+import sys
+
+# Compact binary indexes written next to the JSON files by data-build.py.
+#
+# A file is a header followed by 4 byte aligned sections, all little-endian,
+# so a client can mmap it or fetch single sections (or slices of them) with
+# HTTP range requests:
+#
+#   header   magic "CIDX", version u32, section count u32
+#   table    per section: name (12 bytes), type ("I" u32, "f" float32 or
+#            "B" bytes, 4 bytes), offset u32, item count u32
+#
+# Strings are stored as a "B" section of utf-8 bytes plus an "I" section
+# of count+1 offsets into it.
+
+index_magic = b"CIDX"
+index_version = 1
+header_struct = struct.Struct("<4sII")
+section_struct = struct.Struct("<12s4sII")
+
+def index_write(filename, sections):
+    offset = header_struct.size + section_struct.size*len(sections)
+    table = []
+    datas = []
+    for name, type_, values in sections:
+        if type_ == "B":
+            data = bytes(values)
+            count = len(data)
+        else:
+            data = array.array(type_, values)
+            if sys.byteorder == "big":
+                data.byteswap()
+            count = len(data)
+            data = data.tobytes()
+        table.append(section_struct.pack(name.encode(), type_.encode(), offset, count))
+        padding = (4 - len(data) % 4) % 4
+        datas.append(data + b"\0"*padding)
+        offset += len(data) + padding
+
+    with open(filename, "wb") as f:
+        f.write(header_struct.pack(index_magic, index_version, len(sections)))
+        for entry in table:
+            f.write(entry)
+        for data in datas:
+            f.write(data)
+
+def strings_sections(name, strings):
+    offsets = [0]
+    blob = bytearray()
+    for string in strings:
+        if type(string) == str:
+            string = string.encode()
+        blob += string
+        offsets.append(len(blob))
+    return [
+        [name+"_off", "I", offsets],
+        [name, "B", blob]
+    ]
+
+class Index:
+    def __init__(self, filename):
+        self.file = open(filename, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = header_struct.unpack_from(self.data, 0)
+        if magic != index_magic or version != index_version:
+            raise ValueError(filename+" is not a version "+str(index_version)+" index")
+        self.sections = {}
+        for i in range(count):
+            name, type_, offset, count = section_struct.unpack_from(self.data, header_struct.size + i*section_struct.size)
+            self.sections[name.rstrip(b"\0").decode()] = [type_.rstrip(b"\0").decode(), offset, count]
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def count(self, name):
+        return self.sections[name][2]
+
+    def value(self, name, i):
+        type_, offset, count = self.sections[name]
+        return struct.unpack_from("<"+type_, self.data, offset + 4*i)[0]
+
+    def values(self, name, start, end):
+        type_, offset, count = self.sections[name]
+        values = array.array(type_, self.data[offset + 4*start:offset + 4*end])
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+    def string_bytes(self, name, i):
+        start, end = self.values(name+"_off", i, i+2)
+        offset = self.sections[name][1]
+        return self.data[offset+start:offset+end]
+
+    def string(self, name, i):
+        return self.string_bytes(name, i).decode()
+
+    # index of the first string >= key in a sorted string table
+    def string_bisect(self, name, key):
+        lo = 0
+        hi = self.count(name+"_off") - 1
+        while lo < hi:
+            mid = (lo + hi)//2
+            if self.string_bytes(name, mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+###########################
+# word index
+#   ids      the object ids, sorted, so postings refer to them by position
+#   terms    the words, sorted by their utf-8 bytes
+#   post_off per term the start of its postings
+#   post_ids, post_sc
+#            postings, per term sorted by score then id, with float32 scores
+#   edge, child_off, top_off, top_ids, top_sc
+#            a radix trie over the terms' bytes for search as you type, see
+#            prefix_sections
+###########################
+def word_index_write(filename, word_id_score, top_k=10):
+    ids = set()
+    for id_score in word_id_score.values():
+        ids.update(id_score.keys())
+    ids = sorted(ids)
+    id_index = {}
+    for i, id_ in enumerate(ids):
+        id_index[id_] = i
+
+    # The scores are ranked once, best first, so a posting sorts as the
+    # integer score rank*len(ids) + id index.
+    scores = set()
+    for id_score in word_id_score.values():
+        scores.update(id_score.values())
+    scores = sorted(scores, reverse=True)
+    score_key = {}
+    for i, score in enumerate(scores):
+        score_key[score] = i*len(ids)
+
+    terms = sorted(word_id_score.keys(), key=str.encode)
+    post_off = [0]
+    post_ids = array.array("I")
+    post_sc = array.array("f")
+    term_top = []
+    for term in terms:
+        keys = sorted([score_key[score] + id_index[id_] for id_, score in word_id_score[term].items()])
+        post_ids.extend(map(len(ids).__rmod__, keys))
+        post_sc.extend(map(scores.__getitem__, map(len(ids).__rfloordiv__, keys)))
+        post_off.append(len(post_ids))
+        term_top.append(keys[:top_k])
+
+    sections = strings_sections("ids", ids) + strings_sections("terms", terms)
+    sections.extend([
+        ["post_off", "I", post_off],
+        ["post_ids", "I", post_ids],
+        ["post_sc", "f", post_sc]
+    ])
+    sections.extend(prefix_sections([term.encode() for term in terms], term_top, top_k, len(ids), scores))
+    index_write(filename, sections)
+    return ids
+
+# The trie's nodes are stored breadth first, so the children of node i are
+# the nodes child_off[i] to child_off[i+1], sorted by their edge, which holds
+# the bytes added to the parent's prefix.  Each node keeps the top_k ids of
+# all the terms below it, ranked by their best score for any of those terms.
+# term_top holds per term its top_k postings as sorted word_index_write keys,
+# score rank*count + id index.
+def prefix_sections(terms, term_top, top_k, count, scores):
+    # node: edge, term index or None, children
+    nodes = [[b"", None, []]]
+    ranges = [[0, 0, len(terms), 0]]
+    while len(ranges) > 0:
+        node, lo, hi, depth = ranges.pop()
+        i = lo
+        if lo < hi and len(terms[i]) == depth:
+            nodes[node][1] = i
+            i += 1
+        while i < hi:
+            byte = terms[i][depth]
+            j = i + 1
+            while j < hi and terms[j][depth] == byte:
+                j += 1
+            length = depth + 1
+            first, last = terms[i], terms[j-1]
+            while length < len(first) and length < len(last) and first[length] == last[length]:
+                length += 1
+            nodes[node][2].append(len(nodes))
+            ranges.append([len(nodes), i, j, length])
+            nodes.append([first[depth:length], None, []])
+            i = j
+
+    # children always come after their parent, a node with just a term
+    # has that term's top
+    tops = [None]*len(nodes)
+    for node in range(len(nodes)-1, -1, -1):
+        edge, term, children = nodes[node]
+        if len(children) == 0:
+            tops[node] = term_top[term] if term is not None else []
+            continue
+        candidates = [tops[child] for child in children]
+        if term is not None:
+            candidates.append(term_top[term])
+        # an id's best score has the lowest key, the first one seen of its
+        # id in the sorted merge
+        top = []
+        seen = set()
+        for key in heapq.merge(*candidates):
+            id_i = key % count
+            if id_i not in seen:
+                seen.add(id_i)
+                top.append(key)
+                if len(top) == top_k:
+                    break
+        tops[node] = top
+
+    order = [0]
+    for node in order:
+        order.extend(nodes[node][2])
+    child_off = [1]
+    for node in order:
+        child_off.append(child_off[-1] + len(nodes[node][2]))
+
+    edges = []
+    top_off = [0]
+    top_ids = array.array("I")
+    top_sc = array.array("f")
+    for node in order:
+        edges.append(nodes[node][0])
+        top_ids.extend(map(count.__rmod__, tops[node]))
+        top_sc.extend(map(scores.__getitem__, map(count.__rfloordiv__, tops[node])))
+        top_off.append(len(top_ids))
+
+    return strings_sections("edge", edges) + [
+        ["child_off", "I", child_off],
+        ["top_off", "I", top_off],
+        ["top_ids", "I", top_ids],
+        ["top_sc", "f", top_sc]
+    ]
+
+class WordIndex(Index):
+    def id_get(self, i):
+        return self.string("ids", i)
+
+    def term_find(self, word):
+        key = word.encode()
+        i = self.string_bisect("terms", key)
+        if i < self.count("terms_off") - 1 and self.string_bytes("terms", i) == key:
+            return i
+        return None
+
+    # range of the terms starting with prefix
+    def terms_prefix(self, prefix):
+        key = prefix.encode()
+        start = self.string_bisect("terms", key)
+        end = self.string_bisect("terms", key + b"\xff")
+        return start, end
+
+    def term_postings(self, i):
+        start, end = self.values("post_off", i, i+2)
+        return zip(self.values("post_ids", start, end), self.values("post_sc", start, end))
+
+    def word_id_score(self, word):
+        i = self.term_find(word)
+        if i is None:
+            return []
+        id_score = []
+        for id_i, score in self.term_postings(i):
+            id_score.append([self.id_get(id_i), score])
+        return id_score
+
+    # the top ids for the terms starting with prefix
+    def prefix_top(self, prefix):
+        key = prefix.encode()
+        node = 0
+        while len(key) > 0:
+            start, end = self.values("child_off", node, node+2)
+            edge = None
+            for child in range(start, end):
+                edge = self.string_bytes("edge", child)
+                if edge[:1] == key[:1]:
+                    break
+            if edge is None or edge[:1] != key[:1]:
+                return []
+            node = child
+            if key[:len(edge)] == edge:
+                key = key[len(edge):]
+            elif edge[:len(key)] == key:
+                key = b""
+            else:
+                return []
+
+        start, end = self.values("top_off", node, node+2)
+        id_score = []
+        for id_i, score in zip(self.values("top_ids", start, end), self.values("top_sc", start, end)):
+            id_score.append([self.id_get(id_i), score])
+        return id_score
+
+###########################
+# neighbour index
+#   ids      the object ids, sorted
+#   types    the object types, lowercase and sorted
+#   id_type  per id its type
+#   nbr_off, nbr_ids
+#            per id and type (row id*len(types) + type) the sorted ids of
+#            its neighbours of that type
+#   hop2_off, hop2_ids
+#            optional, the same for the ids two links away that aren't
+#            neighbours, not counting paths through hub_types (tags link
+#            thousands of objects)
+###########################
+def neighbor_index_write(filename, id_type, id_neighbors, hop2=False, hub_types=["tag"]):
+    ids = sorted(id_type.keys())
+    id_index = {}
+    for i, id_ in enumerate(ids):
+        id_index[id_] = i
+    types = sorted(set(id_type.values()))
+    type_index = {}
+    for i, type_ in enumerate(types):
+        type_index[type_] = i
+
+    neighbors = []
+    for id_ in ids:
+        neighbors.append(sorted(id_index[neighbor] for neighbor in id_neighbors.get(id_, []) if neighbor in id_index))
+
+    sections = strings_sections("ids", ids) + strings_sections("types", types)
+    sections.append(["id_type", "I", [type_index[id_type[id_]] for id_ in ids]])
+    sections.extend(neighbor_sections("nbr", ids, neighbors, id_type, type_index))
+
+    if hop2:
+        hub = [id_type[id_] in hub_types for id_ in ids]
+        neighbors2 = []
+        for i, id_neighbors_ in enumerate(neighbors):
+            reached = set()
+            for j in id_neighbors_:
+                if not hub[j]:
+                    reached.update(neighbors[j])
+            reached.difference_update(id_neighbors_)
+            reached.discard(i)
+            neighbors2.append(sorted(reached))
+        sections.extend(neighbor_sections("hop2", ids, neighbors2, id_type, type_index))
+    index_write(filename, sections)
+
+def neighbor_sections(name, ids, neighbors, id_type, type_index):
+    offsets = [0]
+    values = array.array("I")
+    for i, id_ in enumerate(ids):
+        type_neighbors = [[] for type_ in type_index]
+        for j in neighbors[i]:
+            type_neighbors[type_index[id_type[ids[j]]]].append(j)
+        for type_ids in type_neighbors:
+            values.extend(type_ids)
+            offsets.append(len(values))
+    return [
+        [name+"_off", "I", offsets],
+        [name+"_ids", "I", values]
+    ]
+
+class NeighborIndex(Index):
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.types = [self.string("types", i) for i in range(self.count("types_off") - 1)]
+
+    def id_find(self, id_):
+        key = id_.encode()
+        i = self.string_bisect("ids", key)
+        if i < self.count("ids_off") - 1 and self.string_bytes("ids", i) == key:
+            return i
+        return None
+
+    def has_hop2(self):
+        return "hop2_off" in self.sections
+
+    # the ids linked to id_ (hops 2: two links away), of any of the types
+    # or of every type if types is None
+    def neighbors(self, id_, types=None, hops=1):
+        i = self.id_find(id_)
+        if i is None:
+            return []
+        name = "nbr" if hops == 1 else "hop2"
+        ids = []
+        for t, type_ in enumerate(self.types):
+            if types is None or type_ in types:
+                row = i*len(self.types) + t
+                start, end = self.values(name+"_off", row, row+2)
+                for j in self.values(name+"_ids", start, end):
+                    ids.append(self.string("ids", j))
+        return ids
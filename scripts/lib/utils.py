@@ -1,10 +1,36 @@
+import functools
+import os
 import re
 import sys
 import traceback
 import unidecode
 re_id_illegal = re.compile("[^a-z^\d^A-Z]+")
 
+# The same (type, id) pairs are resolved thousands of times per build, so
+# id_create is cached.  The filename is only used for error messages and
+# is kept out of the cache key.
+id_create_cache_size = 1 << 16
+
+class IdCreateError(Exception):
+    pass
+
 def id_create(filename, type_,id_):
+    try:
+        return id_create_cached(type_, id_)
+    except IdCreateError as e:
+        raise Exception(filename+" "+e.__str__())
+
+def id_create_stats():
+    info = id_create_cached.cache_info()
+    return {
+        "hits":info.hits,
+        "misses":info.misses,
+        "size":info.currsize,
+        "maxsize":info.maxsize
+    }
+
+@functools.lru_cache(maxsize=id_create_cache_size)
+def id_create_cached(type_,id_):
     id_ = unidecode.unidecode(id_)
 
     if id_ is not None:
@@ -15,9 +41,9 @@ def id_create(filename, type_,id_):
         elif type_ is not None:
             name = id_
         else:
-            raise Exception(filename+" "+id_+" has key 'type, but 'type' is None")
+            raise IdCreateError(id_+" has key 'type, but 'type' is None")
     else:
-        raise Exception(filename+" id is None")
+        raise IdCreateError("id is None")
 
     if type_ == "presentation":
         type_ = "media"
@@ -48,31 +74,6 @@ def id_create(filename, type_,id_):
 
     return type_.lower()+":"+name.lower()
 
-person_seen = {}
-person_seen_fname = {}
-def person_seen_add(fname,person): 
-    names = [person]
-    if "names" in person:
-        for name in person["names"]:
-            names.append(name)
-    for name in names:
-        n = name["nameLast"].lower()+";"+name["nameFirst"].lower()
-        if n not in person_seen:
-            person_seen[n] = person
-            person_seen_fname[n] = fname
-        else:
-            print ("duplicate",person["id"])
-            print ("    ",person_seen_fname[n])
-            print ("    ",fname)
-
-
-def person_seen_check(nameLast, nameFirst):
-    n = nameLast.lower()+";"+nameFirst.lower()
-    if n in person_seen:
-        return person_seen[n]
-    return None
-
-
 re_year = re.compile("^\s*(\d\d\d\d)[^\d]*(.*)")
 re_num = re.compile("(\d{1,2})[^\d]*(.*)")
 
@@ -100,3 +101,14 @@ def date_parse(value):
         else:
             return year
     return None
+
+# Writes data to filename unless the file already holds it, so unchanged
+# files keep their mtime.  Returns whether it wrote.
+def file_write_changed(filename, data):
+    if os.path.exists(filename):
+        with open(filename, "r") as f:
+            if f.read() == data:
+                return False
+    with open(filename, "w") as f:
+        f.write(data)
+    return True
@@ -3,6 +3,7 @@ import json
 import re
 import os
 import sys
+import lib.parse_cache as parse_cache
 
 re_id_illegal = re.compile("[^a-z^\d^A-Z]+")
 objects = []
@@ -16,6 +17,7 @@ def main():
 
     load_ids("media","data/PANDA-Presentations-json.pl.json")
     load_ids("paper","data/PANDA-Papers-json.pl.json")
+    source_cache = parse_cache.ParseCache()
     for type_ in os.listdir("sources"):
         #print ("loading",type_)
         path = "sources/"+type_
@@ -33,7 +35,7 @@ def main():
                                 else:
                                     id_add(solution_path, "solution", filename)
                 elif re.search("json$",fname): 
-                    obj = json.load(open(fname,"r"))
+                    obj = source_cache.json_load(fname)
                     if "id" in obj:
                         id_add(fname, type_, obj["id"])
                         if "name" in obj:
@@ -45,6 +47,7 @@ def main():
                             name_id[name] = id_create(fname, type_,obj["id"])
                     else:
                         print ("failed to find id in ", fname)
+    source_cache.write()
 
     nothing_found = True
 
@@ -0,0 +1,236 @@
+#!  /usr/bin/env python3
+__author__ = "Bradley Huffaker"
+__email__ = "<bradley@caida.org>"
+# This software is Copyright (C) 2021 The Regents of the University of
+# California. All Rights Reserved. Permission to copy, modify, and
+# distribute this software and its documentation for educational, research
+# and non-profit purposes, without fee, and without a written agreement is
+# hereby granted, provided that the above copyright notice, this paragraph
+# and the following three paragraphs appear in all copies. Permission to
+# make commercial use of this software may be obtained by contacting:
+#
+# Office of Innovation and Commercialization
+#
+# 9500 Gilman Drive, Mail Code 0910
+#
+# University of California
+#
+# La Jolla, CA 92093-0910
+#
+# (858) 534-5815
+#
+# invent@ucsd.edu
+#
+# This software program and documentation are copyrighted by The Regents of
+# the University of California. The software program and documentation are
+# supplied "as is", without any accompanying services from The Regents. The
+# Regents does not warrant that the operation of the program will be
+# uninterrupted or error-free. The end-user understands that the program
+# was developed for research purposes and is advised not to rely
+# exclusively on the program for any reason.
+#
+# IN NO EVENT SHALL THE UNIVERSITY OF CALIFORNIA BE LIABLE TO ANY PARTY FOR
+# DIRECT, INDIRECT, SPECIAL, INCIDENTAL, OR CONSEQUENTIAL DAMAGES,
+# INCLUDING LOST PR OFITS, ARISING OUT OF THE USE OF THIS SOFTWARE AND ITS
+# DOCUMENTATION, EVEN IF THE UNIVERSITY OF CALIFORNIA HAS BEEN ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE. THE UNIVERSITY OF CALIFORNIA SPECIFICALLY
+# DISCLAIMS ANY WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. THE
+# SOFTWARE PROVIDED HEREUNDER IS ON AN "AS IS" BASIS, AND THE UNIVERSITY OF
+# CALIFORNIA HAS NO OBLIGATIONS TO PROVIDE MAINTENANCE, SUPPORT, UPDATES,
+# ENHANCEMENTS, OR MODIFICATIONS.
+
+################################## Imports #####################################
+
+import argparse
+import copy
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+import lib.utils as utils
+import lib.parse_cache as parse_cache
+import lib.person_index as person_index
+import remove_placeholders
+import pubdb_placeholder
+import externallinks_placeholder
+import caida_placeholder
+import caida_dataset_blanks
+
+#################################### Header ####################################
+
+"""
+    Creates the placeholders of the make pubdb, externallinks and caida
+    targets in one step.  sources/ is read once, leaving out the current
+    placeholders, the generators run in their own processes at the same
+    time and their files are written together once all of them succeeded
+    and no two of them made the same file or id.  Only the files whose
+    content changed are written, and only the placeholders no generator
+    made anymore are removed, so the others keep their mtime.
+
+    All of them start at once.  externallinks needs the persons pubdb
+    creates, which pubdb_placeholder.persons_create works out up front from
+    the presenters alone.  The pubdb dumps are read once for both.  caida_placeholder (used when catalog-data-caida
+    exists) must leave out the ids pubdb and externallinks create, so it
+    only parses catalog-data-caida and its placeholders are made from
+    those objects once the other two finished.
+"""
+
+################################# Main Method ##################################
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p", dest="papers_file", type=str, required=True, help="pubdb papers JSON")
+    parser.add_argument("-m", dest="media_file", type=str, required=True, help="pubdb presentations JSON")
+    parser.add_argument("-d", dest="data_papers", type=str, required=True, help="Path to data-papers.yaml")
+    parser.add_argument("-c", dest="caida_path", type=str, default=None, help="Path to catalog-data-caida/sources, blanks are made without it")
+    parser.add_argument("-i", dest="caida_ids", type=str, required=True, help="the JSON mapping file paths to caida ids")
+    parser.add_argument("-j", dest="jobs", type=int, default=os.cpu_count(), help="1 runs the generators one after the other in this process")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    snapshot = parse_cache.snapshot_load(skip=remove_placeholders.re_placeholder.search)
+    print ("loaded sources %.2fs" % (time.perf_counter() - start))
+
+    caida_blanks = args.caida_path is None or not os.path.exists(args.caida_path)
+    if caida_blanks:
+        caida = generator_start(args, "caida", caida_dataset_blanks.placeholders_create, args.caida_ids)
+    else:
+        caida = generator_start(args, "caida", caida_placeholder.objects_parse, args.caida_path, snapshot)
+    # the snapshot has no placeholders, so one index serves both
+    persons = person_index.PersonIndex()
+    persons.load_snapshot("sources/person", snapshot.get("sources/person", []))
+    pubdb_dumps = pubdb_placeholder.pubdb_load(args.papers_file, args.media_file)
+    pubdb = generator_start(args, "pubdb", pubdb_placeholder.placeholders_create, pubdb_dumps, snapshot, persons)
+    externallinks = generator_start(args, "externallinks", externallinks_create, args.data_papers, snapshot, pubdb_dumps, persons)
+
+    name_outputs = [generator_result(pubdb)]
+    if name_outputs[0][1] is None:
+        print ("pubdb failed to parse sources")
+        sys.exit(1)
+    name_outputs.append(generator_result(externallinks))
+
+    caida_outputs = generator_result(caida)
+    if not caida_blanks:
+        ids_added = {}
+        for name, outputs in name_outputs:
+            for filename, data in outputs.items():
+                ids_added[output_id(filename, data)] = filename
+        caida_outputs[1] = caida_placeholder.placeholders_print(caida_outputs[1], ids_added, args.caida_ids)
+    name_outputs.append(caida_outputs)
+
+    collisions = outputs_collisions(name_outputs)
+    if len(collisions) > 0:
+        for collision in collisions:
+            print (collision)
+        print ("no placeholders written")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    filenames = set()
+    written = 0
+    for name, outputs in name_outputs:
+        for filename, data in outputs.items():
+            filenames.add(filename)
+            if utils.file_write_changed(filename, data):
+                written += 1
+    stale = placeholders_list(remove_placeholders.source_dir) - filenames
+    for filename in sorted(stale):
+        os.remove(filename)
+    print ("wrote %d of %d files, removed %d placeholders %.2fs" % (written, len(filenames), len(stale), time.perf_counter() - start))
+
+############################### Helper Methods #################################
+
+# externallinks needs the persons pubdb adds, which it works out with
+# pubdb's own persons_create far quicker than pubdb makes its placeholders.
+# They are added to this process's copy of persons.
+def externallinks_create(data_papers, snapshot, pubdb_dumps, persons):
+    persons_added = []
+    for person in pubdb_placeholder.persons_create(pubdb_dumps, persons).values():
+        if person is not None:
+            persons_added.append([person["filename"], person])
+    return externallinks_placeholder.placeholders_create(data_papers, snapshot, persons_added, persons)
+
+# A generator is started in a process of its own, so the snapshot and the
+# generator's globals stay as they are for the others.  With -j 1 it runs
+# right here on a copy of its arguments.
+def generator_start(args, name, function, *function_args):
+    start = time.perf_counter()
+    if args.jobs <= 1:
+        return [name, start, generator_call(function, copy.deepcopy(function_args)), None]
+    parent, child = multiprocessing.Pipe(False)
+    process = multiprocessing.Process(target=generator_run, args=(child, function, function_args))
+    process.start()
+    child.close()
+    return [name, start, parent, process]
+
+def generator_run(connection, function, function_args):
+    connection.send(generator_call(function, function_args))
+    connection.close()
+
+# returns [outputs, None] or [None, the traceback]
+def generator_call(function, function_args):
+    try:
+        return [function(*function_args), None]
+    except BaseException:
+        return [None, traceback.format_exc()]
+    finally:
+        sys.stdout.flush()
+
+def generator_result(generator):
+    name, start, connection, process = generator
+    if process is None:
+        outputs, error = connection
+    else:
+        try:
+            outputs, error = connection.recv()
+        except EOFError:
+            outputs, error = None, "exited with "+str(process.exitcode)
+        process.join()
+    if error is not None:
+        print (name, "failed")
+        print (error)
+        sys.exit(1)
+    print ("%s %.2fs" % (name, time.perf_counter() - start))
+    return [name, outputs]
+
+# the current placeholder files, which remove_placeholders.py would remove
+def placeholders_list(source_dir):
+    filenames = set()
+    for type_ in os.listdir(source_dir):
+        directory = source_dir+"/"+type_
+        if os.path.isdir(directory):
+            for fname in os.listdir(directory):
+                if remove_placeholders.re_placeholder.search(fname) and os.path.isfile(directory+"/"+fname):
+                    filenames.add(directory+"/"+fname)
+    return filenames
+
+def output_id(filename, data):
+    if not filename.startswith("sources/"):
+        return None
+    return utils.id_create(filename, filename.split("/")[1], json.loads(data)["id"])
+
+# the files and ids more than one generator made
+def outputs_collisions(name_outputs):
+    collisions = []
+    filename_name = {}
+    id_name = {}
+    for name, outputs in name_outputs:
+        for filename, data in outputs.items():
+            if filename in filename_name:
+                collisions.append("%s and %s both made %s" % (filename_name[filename], name, filename))
+            filename_name[filename] = name
+            id_ = output_id(filename, data)
+            if id_ is None:
+                continue
+            if id_ in id_name and id_name[id_][0] != name:
+                collisions.append("%s and %s both made %s\n    %s\n    %s" % (id_name[id_][0], name, id_, id_name[id_][1], filename))
+            id_name[id_] = [name, filename]
+    return collisions
+
+# Run the script given the inputs from the terminal.
+# The generators' processes may import this file, which mustn't run main().
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ import os
 import sys
 import argparse
 import lib.utils as utils
+import lib.parse_cache as parse_cache
+import lib.person_index as person_index
 
 objects = []
 seen = set()
@@ -15,45 +17,63 @@ name_id = {}
 re_ids_only = re.compile("^[a-z_\s:\d]+$")
 re_whitespace = re.compile("\s+")
 
-parser = argparse.ArgumentParser()
-parser.add_argument("-p", dest="papers_file", type=str, required=True)
-parser.add_argument("-m", dest="media_file", type=str, required=True)
-args = parser.parse_args()
+person_seen = None
 
 def main():
-    load_ids("paper","papers",args.papers_file)
-    load_ids("media","presentations",args.media_file)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p", dest="papers_file", type=str, required=True)
+    parser.add_argument("-m", dest="media_file", type=str, required=True)
+    args = parser.parse_args()
+
+    outputs = placeholders_create(pubdb_load(args.papers_file, args.media_file), parse_cache.snapshot_load())
+    if outputs is None:
+        sys.exit(1)
+    for filename, data in outputs.items():
+        utils.file_write_changed(filename, data)
+
+# Returns {filename: JSON} of the placeholders for the pubdb papers and
+# media and their new persons, None if a source file failed to parse.
+# pubdb is what pubdb_load returned, snapshot a parse_cache.snapshot_load
+# of sources and persons a PersonIndex of its persons, made from it if None.
+def placeholders_create(pubdb, snapshot, persons=None):
+    global person_seen
+    person_seen = persons
+    if person_seen is None:
+        person_seen = person_index.PersonIndex()
+        person_seen.load_snapshot("sources/person", snapshot.get("sources/person", []), lambda fname: "___pubdb" in fname)
+
+    id_person = persons_create(pubdb, person_seen)
+    for filename, type_, objs in pubdb:
+        load_ids(filename, type_, objs)
     error = False
-    for type_ in os.listdir("sources"):
-        p = "sources/"+type_
-        if os.path.isdir(p):
-            for fname in os.listdir(p):
-                fname = p+"/"+fname
-                if re.search("json$",fname) and "___pubdb" not in fname: 
-                    try:
-                        obj = json.load(open(fname,"r"))
-                    except json.decoder.JSONDecodeError as e:
-                        error = True
-                        print ("error",fname, e)
-                        continue
-                    except ValueError as e:
-                        print ("-----------\nJSON ERROR in ",fname,"\n")
-                        raise e
-                    id_add(fname, type_, obj["id"])
-                    if "name" in obj:
-                        name = utils.id_create(fname, type_,obj["name"])
-                        #if "evolution" in name:
-                            #print (obj["id"])
-                            #print (name)
-                            #print ()
-                        name_id[name] = utils.id_create(fname, type_,obj["id"])
-                    if type_ == "person":
-                        utils.person_seen_add(fname, obj)
-        
+    for p, entries in snapshot.items():
+        type_ = p.split("/")[-1]
+        for entry in entries:
+            fname = p+"/"+entry[0]
+            if re.search("json$",fname) and "___pubdb" not in fname: 
+                try:
+                    obj = parse_cache.snapshot_json(entry)
+                except json.decoder.JSONDecodeError as e:
+                    error = True
+                    print ("error",fname, e)
+                    continue
+                except ValueError as e:
+                    print ("-----------\nJSON ERROR in ",fname,"\n")
+                    raise e
+                id_add(fname, type_, obj["id"])
+                if "name" in obj:
+                    name = utils.id_create(fname, type_,obj["name"])
+                    #if "evolution" in name:
+                        #print (obj["id"])
+                        #print (name)
+                        #print ()
+                    name_id[name] = utils.id_create(fname, type_,obj["id"])
+    
     if error:
-        sys.exit(1)
+        return None
 
     print ("processing objects")
+    outputs = {}
     for obj in objects:
         obj["tags"].append("caida")
         key_to_key(obj,"pubdb_presentation_id","pubdb_id")
@@ -68,7 +88,6 @@ def main():
                 for key in ["name","person"]:
                     if key in info:
                         info["person"] = "person:"+info[key]
-                        person_create(obj["id"],info["person"])
                         if key != "person":
                             del info[key]
                 if "date" in info:
@@ -150,11 +169,12 @@ def main():
 
 
 
-        json.dump(obj,open(obj["filename"],"w"),indent=4)
+        outputs[obj["filename"]] = json.dumps(obj,indent=4)
 
     for obj in id_person.values():
-        if "already_exists" not in obj:
-            json.dump(obj,open(obj["filename"],"w"),indent=4)
+        if obj is not None:
+            outputs[obj["filename"]] = json.dumps(obj,indent=4)
+    return outputs
 
 
 def key_to_key(obj,key_a,key_b):
@@ -162,23 +182,45 @@ def key_to_key(obj,key_a,key_b):
         obj[key_b] = obj[key_a]
         del obj[key_a]
 
-def load_ids(type_,key, filename):
-    print ("loading", filename)
-    try:
-        data = json.load(open(filename,"r"))
-        for obj in data[key]:
-            obj["__typename"] = type_
-            id_add(filename, type_, obj["id"])
-            original = "sources/"+type_+"/"+obj["id"]+".json"
-            if not os.path.exists(original):
-                obj["filename"] = "sources/"+type_+"/"+obj["id"]+"___pubdb.json"
-                objects.append(obj)
-    except json.decoder.JSONDecodeError as e:
-        print ("error",filename, e)
-    except ValueError as e:
-        print ("JSON error in",filename)
-        raise e
+# Returns [filename, type_, objects] of the two pubdb dumps, with no
+# objects for a dump that isn't valid JSON.
+def pubdb_load(papers_file, media_file):
+    pubdb = []
+    for type_, key, filename in [["paper","papers",papers_file], ["media","presentations",media_file]]:
+        print ("loading", filename)
+        try:
+            pubdb.append([filename, type_, json.load(open(filename,"r"))[key]])
+        except json.decoder.JSONDecodeError as e:
+            print ("error",filename, e)
+            pubdb.append([filename, type_, []])
+        except ValueError as e:
+            print ("JSON error in",filename)
+            raise e
+    return pubdb
 
+def load_ids(filename, type_, objs):
+    for obj in objs:
+        obj["__typename"] = type_
+        id_add(filename, type_, obj["id"])
+        original = "sources/"+type_+"/"+obj["id"]+".json"
+        if not os.path.exists(original):
+            obj["filename"] = "sources/"+type_+"/"+obj["id"]+"___pubdb.json"
+            objects.append(obj)
+
+# Returns {id: person} of the persons for the presenters of the pubdb
+# objects that get a placeholder, None for the ones persons already has.
+# placeholders.py also hands the new ones to externallinks_placeholder.py.
+def persons_create(pubdb, persons):
+    id_person = {}
+    for filename, type_, objs in pubdb:
+        for obj in objs:
+            if os.path.exists("sources/"+type_+"/"+obj["id"]+".json"):
+                continue
+            for info in obj.get("presenters", []):
+                name = info.get("name", info.get("person"))
+                if name is not None:
+                    person_add(persons, id_person, "person:"+name)
+    return id_person
 
 def id_add(filename, type_,id_):
     id_ = utils.id_create(filename, type_,id_)
@@ -204,13 +246,12 @@ def id_yearless(id_):
     return id_
     
 
-id_person = {}
-def person_create(filename, obj):
+def person_add(person_seen, id_person, obj):
     if obj[:7] == "person:":
         nameLast,nameFirst = obj[7:].split("__")
     else:
         nameLast,nameFirst = obj.split("__")
-    person = utils.person_seen_check(nameLast,nameFirst)
+    person = person_seen.check(nameLast,nameFirst)
     if person is None:
         id_ = utils.id_create("filename",'person',obj)
         if id_ not in id_person:
@@ -221,6 +262,7 @@ def person_create(filename, obj):
             }
             id_person[id_] = person
     elif person["id"] not in id_person:
-        person["already_exists"] = True
-        id_person[person["id"]] = person
-main()
+        id_person[person["id"]] = None
+
+if __name__ == "__main__":
+    main()
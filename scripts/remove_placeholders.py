@@ -46,23 +46,26 @@ import re
 source_dir="sources"
 re_placeholder = re.compile("___([^\.]+).json",re.IGNORECASE)
 
-#print ("cleaning up place holders")
-for d_name in sorted(os.listdir(source_dir)):
-    d_path = source_dir+"/"+d_name
-    if os.path.isdir(d_path):
-        type_count = {}
-        for f_name in sorted(os.listdir(d_path)):
-            f_path = d_path+"/"+f_name
-            m = re_placeholder.search(f_name)
-            if os.path.isfile(f_path) and m:
-                t = m.group(1)
-                if t not in type_count:
-                    type_count[t] = 1
-                else:
-                    type_count[t] += 1 
-                os.remove(f_path)
-        if type_count:
-            for type,count in sorted(type_count.items()):
-                print ("%10s %-14s %d  " % (d_name, type,count))
-                d_name = ""
+def main():
+    #print ("cleaning up place holders")
+    for d_name in sorted(os.listdir(source_dir)):
+        d_path = source_dir+"/"+d_name
+        if os.path.isdir(d_path):
+            type_count = {}
+            for f_name in sorted(os.listdir(d_path)):
+                f_path = d_path+"/"+f_name
+                m = re_placeholder.search(f_name)
+                if os.path.isfile(f_path) and m:
+                    t = m.group(1)
+                    if t not in type_count:
+                        type_count[t] = 1
+                    else:
+                        type_count[t] += 1 
+                    os.remove(f_path)
+            if type_count:
+                for type,count in sorted(type_count.items()):
+                    print ("%10s %-14s %d  " % (d_name, type,count))
+                    d_name = ""
 
+if __name__ == "__main__":
+    main()
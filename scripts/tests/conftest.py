@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the scripts import their modules as lib.*
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,78 @@
+import os
+import shutil
+import subprocess
+import pytest
+import lib.git_dates as git_dates
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+dates = [
+    "Mon, 1 Jan 2018 10:00:00 +0000",
+    "Tue, 1 Jan 2019 10:00:00 +0000",
+    "Wed, 1 Jan 2020 10:00:00 +0000",
+    "Fri, 1 Jan 2021 10:00:00 +0000"
+]
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("sources/paper")
+    git("init", "-q")
+    return tmp_path
+
+def git(*args, date=None):
+    env = dict(os.environ, GIT_AUTHOR_NAME="a", GIT_AUTHOR_EMAIL="a@b", GIT_COMMITTER_NAME="a", GIT_COMMITTER_EMAIL="a@b")
+    if date is not None:
+        env["GIT_AUTHOR_DATE"] = env["GIT_COMMITTER_DATE"] = date
+    subprocess.check_call(["git"] + list(args), env=env)
+
+def commit(date, files={}):
+    for filename, content in files.items():
+        with open(filename, "w") as f:
+            f.write(content)
+    git("add", "-A")
+    git("commit", "-q", "-m", date, date=date)
+
+def follow_created(path):
+    return subprocess.check_output(["git", "log", "--diff-filter=A", "--follow", "--format=%aD", "-1", "--", path]).decode().strip()
+
+paper_p = '{"id":"p","name":"the first version of paper p, long enough to be followed"}\n'
+
+def test_rename(repo):
+    commit(dates[0], {"sources/paper/p.json":paper_p})
+    git("mv", "sources/paper/p.json", "sources/paper/q.json")
+    commit(dates[1])
+    path_dates = git_dates.dates_load("sources")
+    assert path_dates["sources/paper/q.json"] == [dates[0], dates[1]]
+
+def test_readded(repo):
+    # p renamed away to q and a new p added later is created then
+    commit(dates[0], {"sources/paper/p.json":paper_p})
+    git("mv", "sources/paper/p.json", "sources/paper/q.json")
+    commit(dates[1])
+    commit(dates[2], {"sources/paper/p.json":'{"id":"p2","name":"nothing like the old one"}\n'})
+    commit(dates[3], {"sources/paper/p.json":'{"id":"p2","name":"nothing like the old one at all"}\n'})
+    path_dates = git_dates.dates_load("sources")
+    assert path_dates["sources/paper/p.json"] == [dates[2], dates[3]]
+    assert path_dates["sources/paper/q.json"] == [dates[0], dates[1]]
+    assert path_dates["sources/paper/p.json"][0] == follow_created("sources/paper/p.json")
+
+def test_readded_copy(repo):
+    # p renamed away to q and added again as a copy of q, which git log
+    # --follow follows back to the first p
+    commit(dates[0], {"sources/paper/p.json":paper_p})
+    git("mv", "sources/paper/p.json", "sources/paper/q.json")
+    commit(dates[1])
+    commit(dates[2], {"sources/paper/p.json":paper_p})
+    path_dates = git_dates.dates_load("sources")
+    assert path_dates["sources/paper/p.json"] == [dates[0], dates[2]]
+    assert path_dates["sources/paper/p.json"][0] == follow_created("sources/paper/p.json")
+
+def test_rename_without_diff_renames(repo):
+    # git log only reports the rename with -M when diff.renames is off
+    git("config", "diff.renames", "false")
+    commit(dates[0], {"sources/paper/p.json":paper_p})
+    git("mv", "sources/paper/p.json", "sources/paper/q.json")
+    commit(dates[1])
+    path_dates = git_dates.dates_load("sources")
+    assert path_dates["sources/paper/q.json"] == [dates[0], dates[1]]
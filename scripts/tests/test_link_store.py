@@ -0,0 +1,45 @@
+import pytest
+import lib.link_store as link_store
+
+@pytest.fixture(params=["numpy", "python"])
+def store(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(link_store, "numpy", None)
+    elif link_store.numpy is None:
+        pytest.skip("numpy is not installed")
+    return link_store.LinkStore()
+
+def link(store, a, b):
+    store.add(a, b, [])
+    store.add(b, a, [])
+
+def test_rank_star(store):
+    # a passes half its rank to b and c, they pass all of theirs back:
+    #   a = .15/3 + .85*(b + c), b = c = .15/3 + .85*a/2
+    link(store, "a", "b")
+    link(store, "a", "c")
+    rank = store.rank(["a", "b", "c"], lambda id_: 1)
+    assert rank["a"] == pytest.approx(18/37)
+    assert rank["b"] == pytest.approx(19/74)
+    assert rank["c"] == pytest.approx(19/74)
+
+def test_rank_weight(store):
+    # a passes everything to b, c gets only the teleport and its own
+    # rank goes back to a
+    link(store, "a", "b")
+    link(store, "a", "c")
+    rank = store.rank(["a", "b", "c"], lambda id_: 0 if id_ == "c" else 1)
+    assert rank["c"] == pytest.approx(.05)
+    assert rank["b"] == pytest.approx(.05 + .85*rank["a"])
+    assert rank["a"] == pytest.approx(.05 + .85*(rank["b"] + rank["c"]))
+
+def test_rank_dangling(store):
+    # d has no links, so its rank is spread over every id
+    link(store, "a", "b")
+    rank = store.rank(["a", "b", "d"], lambda id_: 1)
+    assert sum(rank.values()) == pytest.approx(1)
+    assert rank["a"] == pytest.approx(rank["b"])
+    assert rank["d"] == pytest.approx((.15 + .85*rank["d"])/3)
+
+def test_rank_empty(store):
+    assert store.rank([], lambda id_: 1) == {}
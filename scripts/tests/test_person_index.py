@@ -0,0 +1,26 @@
+import lib.person_index as person_index
+
+def person(id_, nameLast, nameFirst, names=None):
+    person = {"id":"person:"+id_, "nameLast":nameLast, "nameFirst":nameFirst}
+    if names is not None:
+        person["names"] = names
+    return person
+
+def test_check():
+    index = person_index.PersonIndex()
+    index.add("sources/person/claffy__kc.json", person("claffy__kc", "Claffy", "KC", [{"nameLast":"Claffy", "nameFirst":"Kimberly"}]))
+    index.add("sources/person/muller__jose.json", person("muller__jose", "Müller", "José"))
+    assert index.check("claffy", "kc")["id"] == "person:claffy__kc"
+    assert index.check("Claffy", "Kimberly")["id"] == "person:claffy__kc"
+    assert index.check("Muller", "Jose")["id"] == "person:muller__jose"
+    assert index.check("Müller-", "José")["id"] == "person:muller__jose"
+    # initials aren't matched to a full first name
+    assert index.check("Claffy", "K.") is None
+
+def test_check_ambiguous():
+    index = person_index.PersonIndex()
+    index.add("sources/person/lee__ann.json", person("lee__ann", "Lee", "Ann"))
+    index.add("sources/person/lee__ann_2.json", person("lee__ann_2", "Lée", "Ann"))
+    assert index.check("Lee", "Ann")["id"] == "person:lee__ann"
+    assert index.check("Lée", "Ann")["id"] == "person:lee__ann_2"
+    assert index.check("LEE!", "Ann") is None
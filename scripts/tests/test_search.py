@@ -0,0 +1,77 @@
+import json
+import pytest
+import lib.search as search
+
+def catalog_write(tmp_path):
+    files = {
+        "word_id_score.json": {
+            "topology": {"dataset:ark": 2.0, "paper:2020_ark": 1.0},
+            "caida": {"dataset:ark": 1.0, "paper:2020_ark": 1.0, "paper:2019_spoofer": 1.0},
+            "https": {"paper:2019_spoofer": 1.0},
+            "www": {"paper:2019_spoofer": 1.0},
+            "org": {"paper:2019_spoofer": 1.0}
+        },
+        "type_ids.json": {
+            "Dataset": ["dataset:ark"],
+            "Paper": ["paper:2020_ark", "paper:2019_spoofer"],
+            "Person": ["person:luckie__matthew"],
+            "Tag": ["tag:topology"]
+        },
+        "personName_ids.json": {
+            "luckie": ["paper:2019_spoofer"]
+        },
+        "id_id_link.json": {
+            "dataset:ark": {"tag:topology": {}, "paper:2020_ark": {}},
+            "paper:2020_ark": {"tag:topology": {}, "dataset:ark": {}},
+            "paper:2019_spoofer": {},
+            "tag:topology": {"dataset:ark": {}, "paper:2020_ark": {}}
+        },
+        "id_object.json": {
+            "dataset:ark": {"date": "2007-09"},
+            "paper:2020_ark": {"date": "2020-03-01"},
+            "paper:2019_spoofer": {"date": "2019-10-01"}
+        }
+    }
+    for filename, data in files.items():
+        with open(tmp_path/filename, "w") as f:
+            json.dump(data, f)
+    return search.Catalog(str(tmp_path))
+
+def ids(id_score):
+    return sorted(id_ for id_, score in id_score)
+
+def test_query_parse():
+    parsed = search.query_parse("Topology -caida tag:topology -paper:x types=paper,dataset types=media")
+    assert parsed["words"] == ["topology"]
+    assert parsed["words_not"] == ["caida"]
+    assert parsed["ids"] == ["tag:topology"]
+    assert parsed["ids_not"] == ["paper:x"]
+    assert parsed["keys"] == {"types": ["paper", "dataset", "media"]}
+
+def test_key_value(tmp_path):
+    catalog = catalog_write(tmp_path)
+    assert ids(catalog.search("tag:topology")) == ["dataset:ark", "paper:2020_ark"]
+    assert ids(catalog.search("tag:topology types=paper")) == ["paper:2020_ark"]
+    assert ids(catalog.search("caida -tag:topology")) == ["paper:2019_spoofer"]
+    assert ids(catalog.search("persons=luckie")) == ["paper:2019_spoofer", "person:luckie__matthew"]
+    assert ids(catalog.search("ids=dataset:ark,paper:none")) == ["dataset:ark"]
+    assert ids(catalog.search("dates=2020.03")) == ["paper:2020_ark"]
+    assert ids(catalog.search("links=dataset:ark types=paper")) == ["paper:2020_ark"]
+    with pytest.raises(ValueError):
+        catalog.search("colors=red")
+
+def test_empty_value(tmp_path):
+    catalog = catalog_write(tmp_path)
+    assert search.query_parse("types= persons=,")["keys"] == {}
+    assert ids(catalog.search("topology types=")) == ids(catalog.search("topology"))
+    assert ids(catalog.search("links=dataset:ark types=")) == ["paper:2020_ark", "tag:topology"]
+    assert ids(catalog.search("links= types=dataset")) == ["dataset:ark"]
+
+def test_url(tmp_path):
+    catalog = catalog_write(tmp_path)
+    parsed = search.query_parse("https://www.caida.org")
+    assert parsed["ids"] == []
+    assert parsed["words"] == ["https://www.caida.org"]
+    assert ids(catalog.search("https://www.caida.org")) == ["paper:2019_spoofer"]
+    assert ids(catalog.search("caida -https://www.caida.org")) == ["dataset:ark", "paper:2020_ark"]
+    assert ids(catalog.search("links=https://www.caida.org")) == []
@@ -0,0 +1,27 @@
+import lib.search_index as search_index
+
+def word_index(tmp_path, word_id_score):
+    filename = str(tmp_path/"word_id_score.bin")
+    search_index.word_index_write(filename, word_id_score)
+    return search_index.WordIndex(filename)
+
+def test_word_index_empty(tmp_path):
+    index = word_index(tmp_path, {})
+    assert index.count("edge_off") == 2
+    assert index.prefix_top("") == []
+    assert index.prefix_top("a") == []
+    assert index.word_id_score("a") == []
+    index.close()
+
+def test_word_index(tmp_path):
+    index = word_index(tmp_path, {
+        "as": {"dataset:a": 1.0, "paper:b": 3.0},
+        "ask": {"paper:c": 2.0},
+        "b": {"paper:b": 0.5}
+    })
+    assert index.word_id_score("as") == [["paper:b", 3.0], ["dataset:a", 1.0]]
+    assert index.word_id_score("a") == []
+    assert index.prefix_top("a") == [["paper:b", 3.0], ["paper:c", 2.0], ["dataset:a", 1.0]]
+    assert index.prefix_top("ask") == [["paper:c", 2.0]]
+    assert index.prefix_top("c") == []
+    index.close()